@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "theatre.settings")
 
 application = get_asgi_application()
+
+# imported after the app registry is ready
+from theatre_service.autocomplete import autocomplete_index  # noqa: E402
+
+autocomplete_index.warm()
@@ -0,0 +1,154 @@
+"""
+JWT authentication serving users from a short-lived in-process cache.
+
+Tokens issued by the API carry a token version derived from the user's
+password hash and active and staff flags. Changing the password,
+deactivating the user or changing their staff status therefore revokes
+every token issued before. A cached user is
+evicted when it is saved or deleted in the same process; other processes
+pick the change up when their entry expires, ``AUTH_USER_CACHE_TTL``
+seconds after it was loaded.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.utils.crypto import salted_hmac
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+TOKEN_VERSION_CLAIM = "ver"
+USER_CACHE_SIZE = 10000
+
+
+def token_version(user):
+    """Changes whenever the password, is_active or is_staff changes"""
+    return salted_hmac(
+        "theatre.authentication.token_version",
+        f"{user.password}:{user.is_active}:{user.is_staff}",
+    ).hexdigest()[:16]
+
+
+class VersionedTokenMixin:
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[TOKEN_VERSION_CLAIM] = token_version(user)
+        return token
+
+
+class VersionedAccessToken(VersionedTokenMixin, AccessToken):
+    pass
+
+
+class VersionedRefreshToken(VersionedTokenMixin, RefreshToken):
+    # the claims are copied into the access tokens it issues
+    access_token_class = VersionedAccessToken
+
+
+class UserCache:
+    """Users by id with their token version, dropped after the TTL"""
+
+    def __init__(self, max_size=USER_CACHE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # user id -> (expiry, user, token version), oldest first
+        self._entries = OrderedDict()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None, None
+            expires_at, user, version = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None, None
+            return user, version
+
+    def set(self, user_id, user):
+        entry = (
+            time.monotonic() + settings.AUTH_USER_CACHE_TTL,
+            user,
+            token_version(user),
+        )
+        with self._lock:
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry[2]
+
+    def evict(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+def evict_cached_user(sender, instance, **kwargs):
+    user_cache.evict(getattr(instance, api_settings.USER_ID_FIELD))
+
+
+post_save.connect(evict_cached_user, sender=settings.AUTH_USER_MODEL)
+post_delete.connect(evict_cached_user, sender=settings.AUTH_USER_MODEL)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that trusts the claims of versioned tokens and
+    only loads the user when it is not cached or the versions differ.
+    Tokens issued before versions were added are looked up every time
+    """
+
+    def _user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            )
+
+    def get_cached_user(self, validated_token):
+        """The user of a versioned token if the cache can serve it, or None"""
+        version = validated_token.get(TOKEN_VERSION_CLAIM)
+        if version is None:
+            return None
+        user, cached_version = user_cache.get(self._user_id(validated_token))
+        if user is None or cached_version != version:
+            return None
+        # requests must not share one instance
+        return copy.copy(user)
+
+    def get_user(self, validated_token):
+        user = self.get_cached_user(validated_token)
+        if user is not None:
+            return user
+
+        user = super().get_user(validated_token)
+        version = validated_token.get(TOKEN_VERSION_CLAIM)
+        if version is None:
+            return user
+        if user_cache.set(self._user_id(validated_token), user) != version:
+            raise AuthenticationFailed(
+                _("Token has been revoked"), code="token_revoked"
+            )
+        return copy.copy(user)
+
+
+# shared by the code authenticating outside DRF's authentication classes
+authenticator = CachedJWTAuthentication()
@@ -0,0 +1,147 @@
+"""
+Rolling per-view histograms of the sampled requests, rendered in the
+Prometheus text format.
+
+A histogram keeps its counts in ``SLOTS`` slots spanning the
+``REQUEST_METRICS_WINDOW`` setting (in seconds). A slot is cleared when
+its turn comes round again, so the exposed values cover the last window
+instead of the life of the process and should be read directly rather
+than through ``rate()``.
+"""
+import threading
+import time
+from bisect import bisect_left
+from itertools import accumulate
+
+from django.conf import settings
+
+SLOTS = 6
+
+SECONDS_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+# name, help text, bucket bounds
+METRICS = (
+    (
+        "request_duration_seconds",
+        "Time spent in the middleware chain and the view",
+        SECONDS_BUCKETS,
+    ),
+    (
+        "db_duration_seconds",
+        "Time spent executing database queries",
+        SECONDS_BUCKETS,
+    ),
+    (
+        "db_queries",
+        "Number of database queries",
+        QUERY_BUCKETS,
+    ),
+    (
+        "serialize_duration_seconds",
+        "Time spent in the view outside the database",
+        SECONDS_BUCKETS,
+    ),
+    (
+        "render_duration_seconds",
+        "Time spent rendering the response body",
+        SECONDS_BUCKETS,
+    ),
+)
+BUCKETS = {name: buckets for name, _, buckets in METRICS}
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class RollingHistogram:
+    def __init__(self, buckets, window, slots=SLOTS):
+        self.buckets = buckets
+        self.slot_seconds = window / slots
+        self._epochs = [None] * slots
+        # one count per bucket plus the +Inf one, and the sum, per slot
+        self._counts = [[0] * (len(buckets) + 1) for _ in range(slots)]
+        self._sums = [0.0] * slots
+
+    def observe(self, value, now):
+        epoch = int(now // self.slot_seconds)
+        index = epoch % len(self._epochs)
+        if self._epochs[index] != epoch:
+            self._epochs[index] = epoch
+            self._counts[index] = [0] * (len(self.buckets) + 1)
+            self._sums[index] = 0.0
+        self._counts[index][bisect_left(self.buckets, value)] += 1
+        self._sums[index] += value
+
+    def snapshot(self, now):
+        """Cumulative bucket counts and the sum over the live slots"""
+        oldest = int(now // self.slot_seconds) - len(self._epochs) + 1
+        counts = [0] * (len(self.buckets) + 1)
+        total = 0.0
+        for epoch, slot_counts, slot_sum in zip(
+            self._epochs, self._counts, self._sums
+        ):
+            if epoch is not None and epoch >= oldest:
+                counts = [a + b for a, b in zip(counts, slot_counts)]
+                total += slot_sum
+        return list(accumulate(counts)), total
+
+
+def _label(value):
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # metric name -> (view name, method) -> histogram
+        self._histograms = {name: {} for name in BUCKETS}
+
+    def record(self, view, method, values, now=None):
+        """Observes ``values``, a mapping of metric names, for one request"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for name, value in values.items():
+                histograms = self._histograms[name]
+                histogram = histograms.get((view, method))
+                if histogram is None:
+                    histogram = histograms[(view, method)] = RollingHistogram(
+                        BUCKETS[name], settings.REQUEST_METRICS_WINDOW
+                    )
+                histogram.observe(value, now)
+
+    def clear(self):
+        with self._lock:
+            for histograms in self._histograms.values():
+                histograms.clear()
+
+    def render(self, now=None):
+        now = time.monotonic() if now is None else now
+        lines = []
+        with self._lock:
+            for name, help_text, buckets in METRICS:
+                metric = f"theatre_{name}"
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} histogram")
+                bounds = [repr(float(bound)) for bound in buckets] + ["+Inf"]
+                for (view, method), histogram in sorted(
+                    self._histograms[name].items()
+                ):
+                    labels = f'view="{_label(view)}",method="{_label(method)}"'
+                    counts, total = histogram.snapshot(now)
+                    for bound, count in zip(bounds, counts):
+                        lines.append(
+                            f'{metric}_bucket{{{labels},le="{bound}"}} {count}'
+                        )
+                    lines.append(f"{metric}_sum{{{labels}}} {total!r}")
+                    lines.append(f"{metric}_count{{{labels}}} {counts[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
@@ -1,7 +1,46 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class DefaultPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
+
+
+class DefaultCursorPagination(CursorPagination):
+    """
+    Keyset pagination: no COUNT(*) and no OFFSET scans on deep pages.
+    The trailing id keeps the order stable for equal leading values
+    """
+    page_size = DefaultPagination.page_size
+    page_size_query_param = DefaultPagination.page_size_query_param
+    max_page_size = DefaultPagination.max_page_size
+
+
+class PerformanceCursorPagination(DefaultCursorPagination):
+    ordering = ("-show_time", "-id")
+
+
+class ReservationCursorPagination(DefaultCursorPagination):
+    ordering = ("-created_at", "-id")
+
+
+class SwitchablePaginationMixin:
+    """
+    Lets clients opt into ``cursor_pagination_class`` per request with
+    ``?pagination=cursor``; the links it returns carry a ``cursor`` param
+    that keeps later pages in the same mode
+    """
+    cursor_pagination_class = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            params = self.request.query_params
+            if self.cursor_pagination_class is not None and (
+                params.get("pagination") == "cursor" or "cursor" in params
+            ):
+                self._paginator = self.cursor_pagination_class()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
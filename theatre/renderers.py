@@ -0,0 +1,53 @@
+"""
+JSON renderer backed by orjson when it is installed and selected by the
+``JSON_BACKEND`` setting, falling back to DRF's stdlib ``json`` renderer.
+Both produce the same documents for the same data.
+"""
+from django.conf import settings
+from rest_framework.utils import encoders
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+ORJSON_OPTIONS = (
+    # dates go through DRF's encoder to keep its formatting
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    if orjson is not None
+    else 0
+)
+
+
+def use_orjson():
+    return orjson is not None and settings.JSON_BACKEND == "orjson"
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Renders with orjson unless the response is indented or the DRF
+    settings ask for ASCII-only or non-compact output. Types orjson does
+    not know (dates, Decimals, lazy strings, querysets) are converted by
+    DRF's encoder, exactly as the stock renderer does
+    """
+    _encoder = encoders.JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            data is None
+            or not use_orjson()
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data, default=self._encoder.default, option=ORJSON_OPTIONS
+        )
+        # escaped like the stock renderer to stay a javascript subset
+        if b"\xe2\x80" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028")
+            ret = ret.replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
@@ -1,5 +1,11 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+
+from theatre.authentication import VersionedRefreshToken, authenticator
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -22,3 +28,15 @@ class UserSerializer(serializers.ModelSerializer):
             user.save()
 
         return user
+
+
+class VersionedTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = VersionedRefreshToken
+
+
+class VersionedTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refuses refresh tokens revoked by a change of token version"""
+
+    def validate(self, attrs):
+        authenticator.get_user(self.token_class(attrs["refresh"]))
+        return super().validate(attrs)
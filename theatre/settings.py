@@ -50,6 +50,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "theatre.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -94,6 +95,23 @@ if DEBUG:
     DATABASES["default"]["ENGINE"] = "django.db.backends.sqlite3"
     DATABASES["default"]["NAME"] = os.path.join(BASE_DIR, "db.sqlite3")
 
+# the local memory cache is per process: run several workers with
+# REDIS_URL set, so they share throttle counters and cache versions
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+if os.getenv("REDIS_URL"):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("REDIS_URL"),
+    }
+
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", 300))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -141,21 +159,65 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "theatre.pagination_classes.DefaultPagination",
+    "DEFAULT_RENDERER_CLASSES": [
+        "theatre.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "theatre.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_PERMISSION_CLASSES": [
         "theatre.permissions.IsAdminOrIfAuthenticatedReadOnly",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "theatre.authentication.CachedJWTAuthentication",
     ],
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "theatre.throttling.AnonSlidingWindowThrottle",
+        "theatre.throttling.UserSlidingWindowThrottle",
+        "theatre.throttling.CatalogReadThrottle",
+        "theatre.throttling.ReservationWriteThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "50/day", "user": "500/day"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": "50/day",
+        "user": "500/day",
+        "catalog_read": "120/min",
+        "reservation_write": "10/min",
+    },
 }
 
+# cache holding the throttle counters, shared by all workers only when it
+# is Redis: with the local memory cache each worker enforces the rates
+THROTTLE_CACHE_ALIAS = "default"
+
+# "orjson" (used when installed) or "json" for the stdlib encoder
+JSON_BACKEND = os.getenv("JSON_BACKEND", "orjson")
+
+# share of requests measured by theatre.middleware.RequestMetricsMiddleware,
+# 0 turns the instrumentation off
+REQUEST_METRICS_SAMPLE_RATE = float(
+    os.getenv("REQUEST_METRICS_SAMPLE_RATE", 0)
+)
+# seconds of requests covered by the histograms of the metrics endpoint
+REQUEST_METRICS_WINDOW = int(os.getenv("REQUEST_METRICS_WINDOW", 300))
+
+SEAT_HOLD_DEFAULT_MINUTES = int(os.getenv("SEAT_HOLD_DEFAULT_MINUTES", 10))
+SEAT_HOLD_MAX_MINUTES = int(os.getenv("SEAT_HOLD_MAX_MINUTES", 20))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": False,
+    "TOKEN_OBTAIN_SERIALIZER": (
+        "theatre.serializers.VersionedTokenObtainPairSerializer"
+    ),
+    "TOKEN_REFRESH_SERIALIZER": (
+        "theatre.serializers.VersionedTokenRefreshSerializer"
+    ),
 }
+
+# seconds a user loaded by theatre.authentication.CachedJWTAuthentication
+# is served from memory; changes made in other processes show up after it
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", 60))
@@ -0,0 +1,244 @@
+"""
+Sliding-window rate throttles with fixed memory per client.
+
+DRF's ``SimpleRateThrottle`` keeps a list of request timestamps per client
+and rewrites the whole list on every request. Here every client has one
+integer counter per fixed window in the ``THROTTLE_CACHE_ALIAS`` cache
+(Redis when ``REDIS_URL`` is set, so all workers share the limits). The
+rate is estimated from the current window plus the previous one, weighted
+by how much of it still overlaps the sliding window. Counters are bumped
+with the atomic ``incr`` of the cache, and requests that get throttled are
+not counted.
+
+The limits are only shared when the cache is: with the default local
+memory cache, which is per process, every worker counts on its own. Over
+Redis the counters are bumped through their own client, since the
+``incr`` of Django's Redis backend checks the key exists first and a key
+expiring in between would come back without a TTL. When the shared cache
+cannot be reached, the counters are kept in process memory instead, so
+limits still apply per worker.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import (
+    AnonRateThrottle,
+    SimpleRateThrottle,
+    UserRateThrottle,
+)
+
+LOCAL_COUNTERS_SIZE = 100000
+# the shared cache is down, not a bug to hide behind the local counters
+CACHE_ERRORS = (
+    redis.exceptions.ConnectionError,
+    redis.exceptions.TimeoutError,
+    OSError,
+)
+
+
+class CacheCounters:
+    """Counters of a cache whose ``incr`` keeps the TTL set by ``add``"""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def incr(self, key, timeout):
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            if self.cache.add(key, 1, timeout):
+                return 1
+            return self.cache.incr(key)
+
+    def decr(self, key, timeout):
+        try:
+            self.cache.decr(key)
+        except ValueError:
+            pass
+
+    def get(self, key):
+        return self.cache.get(key)
+
+
+@lru_cache(maxsize=None)
+def _redis_client(url):
+    return redis.Redis.from_url(url)
+
+
+class RedisCounters:
+    """
+    Counters of a Redis cache, each bumped and given its TTL in one
+    transaction. Keys and values are the ones of the cache backend
+    """
+
+    def __init__(self, cache, client):
+        self.cache = cache
+        self.client = client
+
+    def _apply(self, key, delta, timeout):
+        key = self.cache.make_and_validate_key(key)
+        pipeline = self.client.pipeline()
+        pipeline.incrby(key, delta)
+        pipeline.expire(key, timeout)
+        return pipeline.execute()[0]
+
+    def incr(self, key, timeout):
+        return self._apply(key, 1, timeout)
+
+    def decr(self, key, timeout):
+        self._apply(key, -1, timeout)
+
+    def get(self, key):
+        value = self.client.get(self.cache.make_and_validate_key(key))
+        return None if value is None else int(value)
+
+
+class LocalCounters:
+    """In-process counters, the least recently created dropped first"""
+
+    def __init__(self, max_size=LOCAL_COUNTERS_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # key -> [count, expiry]
+        self._counters = OrderedDict()
+
+    def incr(self, key, timeout):
+        now = time.monotonic()
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None or counter[1] <= now:
+                counter = self._counters[key] = [0, now + timeout]
+                self._counters.move_to_end(key)
+                while len(self._counters) > self.max_size:
+                    self._counters.popitem(last=False)
+            counter[0] += 1
+            return counter[0]
+
+    def decr(self, key, timeout):
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is not None:
+                counter[0] -= 1
+
+    def get(self, key):
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None or counter[1] <= time.monotonic():
+                return None
+            return counter[0]
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+
+
+local_counters = LocalCounters()
+
+
+class SlidingWindowThrottleMixin:
+    """Replaces the timestamp history of a ``SimpleRateThrottle``"""
+
+    def get_counters(self):
+        alias = settings.THROTTLE_CACHE_ALIAS
+        cache = caches[alias]
+        if not isinstance(cache, RedisCache):
+            return CacheCounters(cache)
+        location = settings.CACHES[alias]["LOCATION"]
+        if isinstance(location, str):
+            location = location.split(",")
+        # Django writes to the first server, the others are replicas
+        return RedisCounters(cache, _redis_client(location[0]))
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        try:
+            return self._allow(self.get_counters())
+        except CACHE_ERRORS:
+            # the shared cache is down, limit per process meanwhile
+            return self._allow(local_counters)
+
+    def _allow(self, counters):
+        window, offset = divmod(self.now, self.duration)
+        key = f"{self.key}:{int(window)}"
+        # a counter is read until the end of the following window
+        timeout = self.duration * 2
+        count = counters.incr(key, timeout)
+        self.previous = counters.get(f"{self.key}:{int(window) - 1}") or 0
+        self.elapsed = offset / self.duration
+
+        if count + self.previous * (1 - self.elapsed) <= self.num_requests:
+            return True
+        counters.decr(key, timeout)
+        self.current = count - 1
+        return False
+
+    def wait(self):
+        """Seconds until the estimate leaves room for one more request"""
+        room = self.num_requests - self.current - 1
+        if room >= 0:
+            # only the weight of the previous window has to drop
+            fraction = 1 - room / self.previous - self.elapsed
+        elif self.num_requests < 1:
+            return None
+        else:
+            # the current window has to end and then lose enough weight
+            fraction = (
+                1 - self.elapsed + 1 - (self.num_requests - 1) / self.current
+            )
+        return max(fraction, 0) * self.duration
+
+
+class AnonSlidingWindowThrottle(SlidingWindowThrottleMixin, AnonRateThrottle):
+    pass
+
+
+class UserSlidingWindowThrottle(SlidingWindowThrottleMixin, UserRateThrottle):
+    pass
+
+
+class BucketRateThrottle(SlidingWindowThrottleMixin, SimpleRateThrottle):
+    """
+    Counts the requests a user, or an anonymous client by IP, makes with
+    one of ``methods`` to the views whose ``throttle_bucket`` is
+    ``bucket``. The rate is the one of ``scope``
+    """
+    bucket = None
+    methods = ()
+
+    def get_cache_key(self, request, view):
+        if (
+            getattr(view, "throttle_bucket", None) != self.bucket
+            or request.method not in self.methods
+        ):
+            return None
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class CatalogReadThrottle(BucketRateThrottle):
+    scope = "catalog_read"
+    bucket = "catalog"
+    methods = SAFE_METHODS
+
+
+class ReservationWriteThrottle(BucketRateThrottle):
+    scope = "reservation_write"
+    bucket = "reservations"
+    methods = ("POST", "PUT", "PATCH", "DELETE")
@@ -8,7 +8,7 @@ from rest_framework_simplejwt.views import (
 )
 
 from theatre import settings
-from theatre.views import ManageUserView, CreateUserView
+from theatre.views import ManageUserView, CreateUserView, MetricsView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -17,6 +17,7 @@ urlpatterns = [
     path("token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("token/verify/", TokenVerifyView.as_view(), name="token_verify"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
     path(
         "api/", include("theatre_service.urls", namespace="theatre-api")
     ),
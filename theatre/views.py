@@ -1,9 +1,11 @@
+from django.http import HttpResponse
 from rest_framework import generics
-from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, AllowAny
+from rest_framework.views import APIView
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
+from theatre.metrics import PROMETHEUS_CONTENT_TYPE, registry
 from theatre.serializers import UserSerializer
 
 
@@ -18,8 +20,17 @@ class CreateTokenView(ObtainAuthToken):
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
-    authentication_classes = (JWTAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def get_object(self):
         return self.request.user
+
+
+class MetricsView(APIView):
+    """Rolling request histograms in the Prometheus text format"""
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return HttpResponse(
+            registry.render(), content_type=PROMETHEUS_CONTENT_TYPE
+        )
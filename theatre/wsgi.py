@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "theatre.settings")
 
 application = get_wsgi_application()
+
+# imported after the app registry is ready
+from theatre_service.autocomplete import autocomplete_index  # noqa: E402
+
+autocomplete_index.warm()
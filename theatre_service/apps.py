@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TheatreServiceConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "theatre_service"
+
+    def ready(self):
+        from theatre_service import signals  # noqa: F401
@@ -0,0 +1,219 @@
+"""
+Async read endpoints for the performance schedule.
+
+Authentication checks the JWT signature and claims and serves the user
+from the in-process user cache, and filtering, serialization and rendering
+all run on the event loop. Django 4.0 has no async ORM, so the queries of
+a request run together in one ``sync_to_async`` call instead of DRF
+wrapping the whole view. The throttles, which count requests in the cache,
+take one more and share the ``catalog_read`` bucket with the sync views.
+"""
+import math
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException,
+    NotAuthenticated,
+    NotFound,
+    Throttled,
+)
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from theatre.authentication import authenticator
+from theatre.pagination_classes import DefaultPagination
+from theatre.renderers import FastJSONRenderer
+from theatre_service.fast_path import ValuesPlan
+from theatre_service.filters import filter_performances
+from theatre_service.models import Performance
+from theatre_service.seat_map import get_seat_map
+from theatre_service.serializers import (
+    PerformanceDetailSerializer,
+    PerformanceListSerializer,
+)
+
+renderer = FastJSONRenderer()
+
+
+def _json_response(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(
+        renderer.render(data),
+        status=status_code,
+        content_type=renderer.media_type,
+    )
+
+
+def _error_response(exc):
+    data = exc.detail
+    if not isinstance(data, dict):
+        data = {"detail": data}
+    response = _json_response(data, exc.status_code)
+    if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+        response["WWW-Authenticate"] = authenticator.authenticate_header(None)
+    if getattr(exc, "wait", None) is not None:
+        response["Retry-After"] = str(math.ceil(exc.wait))
+    return response
+
+
+async def _authenticate(request):
+    """User of the bearer token, loaded only when it is not cached"""
+    header = authenticator.get_header(request)
+    raw_token = header and authenticator.get_raw_token(header)
+    if raw_token is None:
+        raise NotAuthenticated()
+    validated_token = authenticator.get_validated_token(raw_token)
+    user = authenticator.get_cached_user(validated_token)
+    if user is None:
+        user = await sync_to_async(authenticator.get_user)(validated_token)
+    return user
+
+
+class _CatalogView:
+    """What the throttles read off a view, for the async endpoints"""
+    throttle_bucket = "catalog"
+
+
+def _check_throttles(request):
+    """Same checks as ``APIView.check_throttles``, against the same counters"""
+    view = _CatalogView()
+    durations = [
+        throttle.wait()
+        for throttle in (
+            throttle_class()
+            for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES
+        )
+        if not throttle.allow_request(request, view)
+    ]
+    if durations:
+        raise Throttled(
+            max((wait for wait in durations if wait is not None), default=None)
+        )
+
+
+def async_api_view(view):
+    """
+    Wraps an async view taking a DRF ``Request``: only GET is allowed,
+    the caller must be authenticated, the configured throttles apply as
+    to the sync catalog views and API exceptions become JSON
+    """
+    async def wrapper(request, *args, **kwargs):
+        if request.method != "GET":
+            response = _json_response(
+                {"detail": f'Method "{request.method}" not allowed.'},
+                status.HTTP_405_METHOD_NOT_ALLOWED,
+            )
+            response["Allow"] = "GET"
+            return response
+        try:
+            drf_request = Request(request)
+            drf_request.user = await _authenticate(request)
+            # the counters live in the cache, which may be a network call
+            await sync_to_async(_check_throttles)(drf_request)
+            return _json_response(await view(drf_request, *args, **kwargs))
+        except APIException as exc:
+            return _error_response(exc)
+
+    wrapper.__name__ = view.__name__
+    wrapper.__doc__ = view.__doc__
+    return wrapper
+
+
+def _page_size(request):
+    try:
+        page_size = int(
+            request.query_params[DefaultPagination.page_size_query_param]
+        )
+    except (KeyError, ValueError):
+        return DefaultPagination.page_size
+    if page_size <= 0:
+        return DefaultPagination.page_size
+    return min(page_size, DefaultPagination.max_page_size)
+
+
+def _page_number(request):
+    try:
+        number = int(request.query_params.get("page", 1))
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise NotFound("Invalid page.")
+    return number
+
+
+def _load_performance_page(request, number, page_size):
+    serializer = PerformanceListSerializer(context={"request": request})
+    plan = ValuesPlan(serializer)
+    queryset = plan.queryset(
+        filter_performances(Performance.objects.all(), request.query_params)
+    )
+    count = queryset.count()
+    offset = (number - 1) * page_size
+    if offset and offset >= count:
+        raise NotFound("Invalid page.")
+    return count, plan.build(queryset[offset:offset + page_size])
+
+
+def _page_link(request, number, count, page_size):
+    if number < 1 or (number - 1) * page_size >= count:
+        return None
+    url = request.build_absolute_uri()
+    if number == 1:
+        return remove_query_param(url, "page")
+    return replace_query_param(url, "page", number)
+
+
+@async_api_view
+async def performance_list(request):
+    """Same body as the sync performance list with page pagination"""
+    number = _page_number(request)
+    page_size = _page_size(request)
+    count, results = await sync_to_async(_load_performance_page)(
+        request, number, page_size
+    )
+    return {
+        "count": count,
+        "next": _page_link(request, number + 1, count, page_size),
+        "previous": _page_link(request, number - 1, count, page_size),
+        "results": results,
+    }
+
+
+def _get_performance(queryset, pk):
+    try:
+        return queryset.get(pk=pk)
+    except (Performance.DoesNotExist, ValueError):
+        raise NotFound()
+
+
+def _load_performance(pk):
+    return _get_performance(
+        Performance.objects
+        .select_related("play", "theatre_hall")
+        .prefetch_related("play__actors", "play__genres"),
+        pk,
+    )
+
+
+@async_api_view
+async def performance_detail(request, pk):
+    performance = await sync_to_async(_load_performance)(pk)
+    return PerformanceDetailSerializer(
+        performance, context={"request": request}
+    ).data
+
+
+def _load_seat_map(pk):
+    return get_seat_map(
+        _get_performance(
+            Performance.objects.select_related("theatre_hall"), pk
+        )
+    )
+
+
+@async_api_view
+async def performance_seats(request, pk):
+    """Same body as the sync seats action"""
+    return await sync_to_async(_load_seat_map)(pk)
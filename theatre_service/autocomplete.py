@@ -0,0 +1,123 @@
+import logging
+import re
+import threading
+from bisect import bisect_left
+
+from django.db import DatabaseError
+
+from theatre_service.caching import get_model_versions
+from theatre_service.models import Actor, Genre, Play
+
+INDEXED_MODELS = (Play, Actor, Genre)
+
+logger = logging.getLogger(__name__)
+
+
+def _words(text):
+    return re.findall(r"\w+", text.lower())
+
+
+class PrefixIndex:
+    """
+    Process-local sorted array of every word of play titles, actor names
+    and genre names. A prefix lookup is a binary search plus a scan of the
+    matching run. The index is rebuilt on the first lookup after the model
+    versions used by the response cache change. Other processes only see
+    those versions change through a shared cache, so with several workers
+    ``REDIS_URL`` must be set: each process of the default local memory
+    cache keeps serving its own index until it edits the catalog itself
+    """
+
+    def __init__(self):
+        self._build_lock = threading.Lock()
+        # (versions, sorted words, entry position per word, entries),
+        # replaced as a whole so readers never see a half-built index
+        self._state = (None, [], [], [])
+
+    def _load_entries(self):
+        entries = [
+            ("play", pk, title)
+            for pk, title in Play.objects.values_list("id", "title")
+        ]
+        entries += [
+            ("actor", pk, f"{first_name} {last_name}")
+            for pk, first_name, last_name in Actor.objects.values_list(
+                "id", "first_name", "last_name"
+            )
+        ]
+        entries += [
+            ("genre", pk, name)
+            for pk, name in Genre.objects.values_list("id", "name")
+        ]
+        return entries
+
+    def rebuild(self, versions=None):
+        if versions is None:
+            versions = get_model_versions(INDEXED_MODELS)
+        entries = self._load_entries()
+        postings = sorted(
+            (word, position)
+            for position, (_, _, label) in enumerate(entries)
+            for word in set(_words(label))
+        )
+        self._state = (
+            versions,
+            [word for word, _ in postings],
+            [position for _, position in postings],
+            entries,
+        )
+
+    def warm(self):
+        """
+        Builds the index ahead of the first request. A database that is
+        not ready yet, like one without migrations, is logged and left to
+        the first lookup, which builds the index otherwise
+        """
+        try:
+            self.rebuild()
+        except DatabaseError:
+            logger.exception("Could not warm the autocomplete index")
+
+    def _ensure_fresh(self):
+        versions = get_model_versions(INDEXED_MODELS)
+        if versions != self._state[0]:
+            with self._build_lock:
+                if versions != self._state[0]:
+                    self.rebuild(versions)
+
+    def search(self, text, limit=10):
+        """
+        Returns up to ``limit`` entries having a word that starts with each
+        word of ``text``, in alphabetical order of the first word's match
+        """
+        words = _words(text)
+        if not words:
+            return []
+        self._ensure_fresh()
+
+        _, keys, postings, entries = self._state
+        first, rest = words[0], words[1:]
+        results = []
+        seen = set()
+        index = bisect_left(keys, first)
+        while (
+            index < len(keys)
+            and keys[index].startswith(first)
+            and len(results) < limit
+        ):
+            position = postings[index]
+            index += 1
+            if position in seen:
+                continue
+            seen.add(position)
+            kind, pk, label = entries[position]
+            label_words = _words(label)
+            if all(
+                any(word.startswith(prefix) for word in label_words)
+                for prefix in rest
+            ):
+                results.append({"type": kind, "id": pk, "label": label})
+        return results
+
+
+autocomplete_index = PrefixIndex()
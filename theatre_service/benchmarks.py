@@ -0,0 +1,429 @@
+"""
+Benchmark harness for the API under realistic data volumes.
+
+``seed`` bulk-inserts a configurable catalog, schedule and booking
+history whose rows are recognisable by ``BENCH_PREFIX``; ``run_cases``
+times the list, retrieve and create actions of every viewset against it
+in-process. Both back the ``seed_bench`` and ``run_bench`` commands.
+"""
+import math
+import random
+import statistics
+import tracemalloc
+from datetime import timedelta
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.db.models import Q
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from theatre.authentication import VersionedAccessToken
+from theatre_service.caching import bump_model_version
+from theatre_service.models import (
+    Actor,
+    Genre,
+    Performance,
+    Play,
+    Reservation,
+    TheatreHall,
+    Ticket,
+)
+from theatre_service.signals import VERSIONED_MODELS
+
+BENCH_PREFIX = "Bench"
+BENCH_ADMIN = "bench_admin"
+BENCH_USER = "bench_user_{}"
+BENCH_PASSWORD = "bench-password"
+
+DEFAULT_VOLUMES = {
+    "actors": 2000,
+    "genres": 50,
+    "plays": 1000,
+    "theatre_halls": 20,
+    "performances": 20000,
+    "users": 500,
+    "reservations": 50000,
+    "tickets_per_reservation": 3,
+}
+ACTORS_PER_PLAY = 5
+GENRES_PER_PLAY = 2
+# show times are this far apart, so (play, show_time, hall) stays unique
+SHOW_TIME_STEP = timedelta(minutes=30)
+
+# the response, seat map and throttle caches are swapped for a dummy one,
+# otherwise every repeated GET after the first would be a cache hit
+BENCH_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+}
+
+
+def seed(volumes, batch_size=1000, rng=None):
+    """
+    Inserts the rows described by ``volumes`` (see ``DEFAULT_VOLUMES``)
+    and returns the number of rows inserted per model. Bulk inserts skip
+    signals, so the sold counters and cache versions are refreshed at the
+    end
+    """
+    rng = rng or random.Random(0)
+    inserted = {}
+
+    def insert(model, rows):
+        created = model.objects.bulk_create(rows, batch_size=batch_size)
+        inserted[model._meta.label] = (
+            inserted.get(model._meta.label, 0) + len(created)
+        )
+        return created
+
+    actors = insert(Actor, (
+        Actor(first_name=BENCH_PREFIX, last_name=f"Actor {index}")
+        for index in range(volumes["actors"])
+    ))
+    genres = insert(Genre, (
+        Genre(name=f"{BENCH_PREFIX} genre {index}")
+        for index in range(volumes["genres"])
+    ))
+    plays = insert(Play, (
+        Play(
+            title=f"{BENCH_PREFIX} play {index}",
+            description=f"Benchmark play number {index}. " * 10,
+            duration=rng.randint(60, 180),
+        )
+        for index in range(volumes["plays"])
+    ))
+    insert(Play.actors.through, (
+        Play.actors.through(play_id=play.id, actor_id=actor.id)
+        for play in plays
+        for actor in rng.sample(actors, min(ACTORS_PER_PLAY, len(actors)))
+    ))
+    insert(Play.genres.through, (
+        Play.genres.through(play_id=play.id, genre_id=genre.id)
+        for play in plays
+        for genre in rng.sample(genres, min(GENRES_PER_PLAY, len(genres)))
+    ))
+
+    halls = []
+    for index in range(volumes["theatre_halls"]):
+        hall = TheatreHall(
+            name=f"{BENCH_PREFIX} hall {index}",
+            rows=rng.randint(10, 25),
+            seats_in_row=rng.randint(15, 30),
+        )
+        # bulk_create does not call save(), which fills in the capacity
+        hall.capacity = hall.rows * hall.seats_in_row
+        halls.append(hall)
+    halls = insert(TheatreHall, halls)
+
+    first_show = timezone.now().replace(
+        minute=0, second=0, microsecond=0
+    ) - timedelta(days=30)
+    performances = insert(Performance, (
+        Performance(
+            play=rng.choice(plays),
+            theatre_hall=rng.choice(halls),
+            show_time=first_show + index * SHOW_TIME_STEP,
+        )
+        for index in range(volumes["performances"])
+    ))
+
+    password = make_password(BENCH_PASSWORD)
+    users = [
+        get_user_model()(
+            username=BENCH_ADMIN,
+            email=f"{BENCH_ADMIN}@example.com",
+            password=password,
+            is_staff=True,
+        )
+    ]
+    users += [
+        get_user_model()(
+            username=BENCH_USER.format(index),
+            email=f"{BENCH_USER.format(index)}@example.com",
+            password=password,
+        )
+        for index in range(volumes["users"])
+    ]
+    users = insert(get_user_model(), users)
+
+    reservations = insert(Reservation, (
+        Reservation(user=users[index % len(users)])
+        for index in range(volumes["reservations"])
+    ))
+    # seats are handed out in order, a full performance gets no more
+    next_seat = {}
+
+    def tickets():
+        for reservation in reservations:
+            for _ in range(volumes["tickets_per_reservation"]):
+                performance = rng.choice(performances)
+                seat = next_seat.get(performance.id, 0)
+                if seat >= performance.theatre_hall.capacity:
+                    continue
+                next_seat[performance.id] = seat + 1
+                seats_in_row = performance.theatre_hall.seats_in_row
+                yield Ticket(
+                    row=seat // seats_in_row + 1,
+                    seat=seat % seats_in_row + 1,
+                    performance=performance,
+                    reservation=reservation,
+                )
+
+    insert(Ticket, tickets())
+
+    Performance.rebuild_tickets_sold()
+    for model in VERSIONED_MODELS:
+        bump_model_version(model)
+    return inserted
+
+
+def _delete_rows(queryset):
+    """
+    Deletes the rows of ``queryset`` with one plain DELETE. ``.delete()``
+    would send the ticket and reservation delete signals once per row,
+    and the counters they keep are rebuilt by ``clear`` anyway
+    """
+    meta = queryset.model._meta
+    sql, params = queryset.values("pk").query.sql_with_params()
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {quote_name(meta.db_table)} "
+            f"WHERE {quote_name(meta.pk.column)} IN ({sql})",
+            params,
+        )
+
+
+def clear():
+    """Deletes the rows inserted by ``seed``"""
+    users = get_user_model().objects.filter(
+        Q(username=BENCH_ADMIN)
+        | Q(username__startswith=BENCH_USER.format(""))
+    )
+    performances = Performance.objects.filter(
+        play__title__startswith=BENCH_PREFIX
+    )
+    _delete_rows(Ticket.objects.filter(
+        Q(performance__in=performances) | Q(reservation__user__in=users)
+    ))
+    _delete_rows(Reservation.objects.filter(user__in=users))
+    users.delete()
+    Play.objects.filter(title__startswith=BENCH_PREFIX).delete()
+    TheatreHall.objects.filter(name__startswith=BENCH_PREFIX).delete()
+    Actor.objects.filter(first_name=BENCH_PREFIX).delete()
+    Genre.objects.filter(name__startswith=BENCH_PREFIX).delete()
+    Performance.rebuild_tickets_sold()
+    for model in VERSIONED_MODELS:
+        bump_model_version(model)
+
+
+class BenchCase:
+    """One endpoint; ``payload(n)`` builds the body of the n-th request"""
+
+    def __init__(self, name, method, url, payload=None, status_code=200):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.payload = payload
+        self.status_code = status_code
+
+    def request(self, client, index):
+        if self.method == "post":
+            return client.post(
+                self.url,
+                self.payload(index),
+                content_type="application/json",
+            )
+        return client.get(self.url)
+
+
+def _free_seats(performance):
+    taken = set(performance.tickets.values_list("row", "seat"))
+    hall = performance.theatre_hall
+    return [
+        (row, seat)
+        for row in range(1, hall.rows + 1)
+        for seat in range(1, hall.seats_in_row + 1)
+        if (row, seat) not in taken
+    ]
+
+
+def bench_cases(user):
+    """
+    List, retrieve and create cases of every viewset, retrieving the
+    first seeded object and creating rows named after the request index
+    """
+    actor = Actor.objects.filter(first_name=BENCH_PREFIX).first()
+    genre = Genre.objects.filter(name__startswith=BENCH_PREFIX).first()
+    play = Play.objects.filter(title__startswith=BENCH_PREFIX).first()
+    hall = TheatreHall.objects.filter(name__startswith=BENCH_PREFIX).first()
+    performance = (
+        Performance.objects
+        .filter(play__title__startswith=BENCH_PREFIX)
+        .select_related("theatre_hall")
+        .order_by("tickets_sold", "pk")
+        .first()
+    )
+    reservation = Reservation.objects.filter(user=user).first()
+    if None in (actor, genre, play, hall, performance, reservation):
+        raise LookupError("The benchmark data has not been seeded.")
+
+    free_seats = _free_seats(performance)
+    far_future = timezone.now() + timedelta(days=3650)
+
+    def url(name, *args):
+        return reverse(f"theatre-api:{name}", args=args)
+
+    creates = {
+        "actor": lambda n: {
+            "first_name": f"{BENCH_PREFIX} run", "last_name": f"Actor {n}"
+        },
+        "genre": lambda n: {"name": f"{BENCH_PREFIX} run genre {n}"},
+        "play": lambda n: {
+            "title": f"{BENCH_PREFIX} run play {n}",
+            "description": "Benchmark play",
+            "duration": 120,
+            "actors": [actor.id],
+            "genres": [genre.id],
+        },
+        "theatrehall": lambda n: {
+            "name": f"{BENCH_PREFIX} run hall {n}",
+            "rows": 20,
+            "seats_in_row": 30,
+        },
+        "performance": lambda n: {
+            "play": play.id,
+            "theatre_hall": hall.id,
+            "show_time": (far_future + n * SHOW_TIME_STEP).isoformat(),
+        },
+        "reservation": lambda n: {
+            "tickets": [
+                {
+                    "row": free_seats[n][0],
+                    "seat": free_seats[n][1],
+                    "performance": performance.id,
+                }
+            ]
+        },
+    }
+    objects = {
+        "actor": actor,
+        "genre": genre,
+        "play": play,
+        "theatrehall": hall,
+        "performance": performance,
+        "reservation": reservation,
+    }
+
+    cases = []
+    for basename, instance in objects.items():
+        cases += [
+            BenchCase(f"{basename}-list", "get", url(f"{basename}-list")),
+            BenchCase(
+                f"{basename}-retrieve",
+                "get",
+                url(f"{basename}-detail", instance.pk),
+            ),
+            BenchCase(
+                f"{basename}-create",
+                "post",
+                url(f"{basename}-list"),
+                payload=creates[basename],
+                status_code=201,
+            ),
+        ]
+    cases.append(
+        BenchCase(
+            "performance-seats",
+            "get",
+            url("performance-seats", performance.pk),
+        )
+    )
+    return cases, len(free_seats)
+
+
+def _percentile(values, fraction):
+    """Nearest-rank percentile of sorted ``values``"""
+    return values[max(math.ceil(fraction * len(values)) - 1, 0)]
+
+
+def run_case(client, case, repeat, warmup=2):
+    """
+    Times ``repeat`` requests after ``warmup`` untimed ones, then traces
+    the allocations of one more request for its peak memory
+    """
+    index = 0
+
+    def request():
+        nonlocal index
+        response = case.request(client, index)
+        index += 1
+        if response.status_code != case.status_code:
+            raise AssertionError(
+                f"{case.name} answered {response.status_code}: "
+                f"{response.content[:200]!r}"
+            )
+
+    for _ in range(warmup):
+        request()
+
+    latencies, queries = [], []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            started = perf_counter()
+            request()
+            latencies.append((perf_counter() - started) * 1000)
+        queries.append(len(captured))
+
+    tracemalloc.start()
+    try:
+        request()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "name": case.name,
+        "method": case.method.upper(),
+        "url": case.url,
+        "requests": repeat,
+        "queries": max(queries),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(_percentile(latencies, 0.95), 3),
+        "max_ms": round(latencies[-1], 3),
+        "peak_memory_kib": round(peak / 1024, 1),
+    }
+
+
+def run_cases(repeat, names=None):
+    """Results of every case, or of the ``names`` ones, as the staff user"""
+    user = get_user_model().objects.filter(username=BENCH_ADMIN).first()
+    if user is None:
+        raise LookupError("The benchmark data has not been seeded.")
+    client = Client(
+        HTTP_AUTHORIZATION=f"Bearer {VersionedAccessToken.for_user(user)}"
+    )
+
+    cases, free_seats = bench_cases(user)
+    if names:
+        cases = [case for case in cases if case.name in names]
+    # the reservation case books one free seat per request
+    if free_seats < repeat + 3:
+        raise LookupError(
+            f"The least booked performance has {free_seats} free seats, "
+            f"{repeat + 3} are needed."
+        )
+    return [run_case(client, case, repeat) for case in cases]
+
+
+def dataset_size():
+    return {
+        model._meta.label: model.objects.count()
+        for model in (
+            Actor, Genre, Play, TheatreHall, Performance, Reservation, Ticket
+        )
+    }
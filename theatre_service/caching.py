@@ -0,0 +1,143 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+MODEL_VERSION_KEY = "model_version:{}"
+RESPONSE_CACHE_KEY = "response:{}:{}:{}:{}"
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def get_model_versions(models):
+    """
+    Returns the current version token of every model in one cache round
+    trip. Tokens start from a nanosecond timestamp, so a counter evicted
+    from the cache never comes back with a value it had before. They never
+    expire, as that would drop every ETag and cached response with them
+    """
+    cache = get_cache()
+    keys = [
+        MODEL_VERSION_KEY.format(model._meta.label_lower) for model in models
+    ]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _incr_model_version(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def bump_model_version(model):
+    """
+    Bumps the version right away and again after commit, so a response
+    built by a concurrent reader before the change became visible is not
+    served under the new version
+    """
+    key = MODEL_VERSION_KEY.format(model._meta.label_lower)
+    _incr_model_version(key)
+    transaction.on_commit(lambda: _incr_model_version(key))
+
+
+class ModelVersionMixin:
+    """Gives a viewset the versions of the models its responses depend on"""
+    cache_dependencies = ()
+
+    def get_dependency_versions(self):
+        if not hasattr(self, "_dependency_versions"):
+            self._dependency_versions = "-".join(
+                str(version)
+                for version in get_model_versions(self.cache_dependencies)
+            )
+        return self._dependency_versions
+
+
+class ConditionalGetMixin(ModelVersionMixin):
+    """
+    Tags list and retrieve responses with a weak ETag derived from the
+    dependency versions and answers a matching If-None-Match with 304
+    before any query or serializer runs
+    """
+    etag_per_user = False
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_etag(self, request):
+        parts = [
+            self.get_dependency_versions(),
+            request.build_absolute_uri(),
+            request.META.get("HTTP_ACCEPT", ""),
+        ]
+        if self.etag_per_user:
+            parts.append(str(request.user.pk))
+        digest = hashlib.md5("|".join(parts).encode()).hexdigest()
+        return f'W/"{digest}"'
+
+    def _conditional_response(self, handler, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH", "")
+        if etag in if_none_match.split(", ") or if_none_match == "*":
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (
+            status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED
+        ):
+            response["ETag"] = etag
+        return response
+
+
+class CachedResponseMixin(ModelVersionMixin):
+    """
+    Caches the data of list and retrieve responses per absolute URL (path,
+    query params and page). Entries are keyed by the versions of
+    ``cache_dependencies``, which model signals bump on every change, so
+    stale entries are never read and simply expire
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        cache = get_cache()
+        key = RESPONSE_CACHE_KEY.format(
+            self.basename,
+            self.action,
+            self.get_dependency_versions(),
+            hashlib.md5(request.build_absolute_uri().encode()).hexdigest(),
+        )
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        return response
@@ -0,0 +1,111 @@
+"""
+Streaming CSV and NDJSON exports of reservations and tickets.
+
+Rows are read with ``values_list().iterator()``, which uses a server-side
+cursor on PostgreSQL, and written out one line at a time, so memory use
+does not grow with the size of the export.
+"""
+import csv
+from datetime import date
+
+from django.db.models import Count
+from rest_framework.utils import encoders
+
+from theatre.renderers import FastJSONRenderer
+from theatre_service.models import Reservation, Ticket
+
+CHUNK_SIZE = 2000
+
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+RESERVATION_COLUMNS = (
+    ("id", "id"),
+    ("created_at", "created_at"),
+    ("user_id", "user_id"),
+    ("username", "user__username"),
+    ("email", "user__email"),
+    ("tickets", "ticket_count"),
+)
+
+TICKET_COLUMNS = (
+    ("id", "id"),
+    ("reservation_id", "reservation_id"),
+    ("reserved_at", "reservation__created_at"),
+    ("email", "reservation__user__email"),
+    ("performance_id", "performance_id"),
+    ("play", "performance__play__title"),
+    ("theatre_hall", "performance__theatre_hall__name"),
+    ("show_time", "performance__show_time"),
+    ("row", "row"),
+    ("seat", "seat"),
+)
+
+
+def _show_time_filter(prefix, show_time_range):
+    start, end = show_time_range
+    conditions = {}
+    if start:
+        conditions[f"{prefix}show_time__gte"] = start
+    if end:
+        conditions[f"{prefix}show_time__lt"] = end
+    return conditions
+
+
+def reservation_rows(show_time_range=(None, None)):
+    """
+    Reservations with their number of tickets. Within a date range both
+    are limited to tickets for performances shown in that range
+    """
+    return (
+        Reservation.objects
+        .filter(**_show_time_filter("tickets__performance__", show_time_range))
+        .annotate(ticket_count=Count("tickets"))
+        .order_by("pk")
+        .values_list(*(lookup for _, lookup in RESERVATION_COLUMNS))
+    )
+
+
+def ticket_rows(show_time_range=(None, None)):
+    return (
+        Ticket.objects
+        .filter(**_show_time_filter("performance__", show_time_range))
+        .order_by("pk")
+        .values_list(*(lookup for _, lookup in TICKET_COLUMNS))
+    )
+
+
+class _Echo:
+    """File-like object handing back what csv.writer writes to it"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(columns, rows):
+    # dates are written like in the JSON responses
+    encode_date = encoders.JSONEncoder().default
+    writer = csv.writer(_Echo())
+    yield writer.writerow(name for name, _ in columns)
+    for row in rows:
+        yield writer.writerow(
+            encode_date(value) if isinstance(value, date) else value
+            for value in row
+        )
+
+
+def _ndjson_lines(columns, rows):
+    renderer = FastJSONRenderer()
+    names = [name for name, _ in columns]
+    for row in rows:
+        yield renderer.render(dict(zip(names, row))) + b"\n"
+
+
+def export_lines(export_format, columns, queryset):
+    """Lines of the export, reading ``queryset`` in chunks"""
+    rows = queryset.iterator(chunk_size=CHUNK_SIZE)
+    if export_format == "csv":
+        return _csv_lines(columns, rows)
+    return _ndjson_lines(columns, rows)
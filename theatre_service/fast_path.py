@@ -0,0 +1,227 @@
+"""
+Values fast path for list actions.
+
+Rows are fetched with ``QuerySet.values()`` and turned into plain dicts
+by accessors compiled once per request from the serializer's fields, so
+no model instances are built and only the fields that need formatting
+(dates, files) go through their DRF ``to_representation``. Relations
+are loaded with one query each, like ``prefetch_related`` would.
+
+A serializer whose fields cannot all be expressed this way is served by
+the regular path. Properties can be supported by declaring a database
+expression computing them in the serializer's ``values_expressions``.
+"""
+from collections import defaultdict
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, FileField
+from rest_framework import serializers
+from rest_framework.response import Response
+
+
+def _resolve(model, lookup):
+    """Returns the model field ``lookup`` ends at, or None"""
+    field = None
+    for part in lookup.split("__"):
+        if model is None:
+            return None
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        model = field.related_model
+    return field
+
+
+class ValuesPlan:
+    """Compiled accessors of one (child) serializer, see module docstring"""
+
+    def __init__(self, serializer):
+        self.model = serializer.Meta.model
+        self.pk = self.model._meta.pk.attname
+        self.lookups = {self.pk}
+        self.expressions = {}
+        self.loaders = {}
+        self.accessors = []
+        expressions = getattr(serializer, "values_expressions", {})
+        for name, field in serializer.fields.items():
+            if name in expressions:
+                key = f"_{name}"
+                self.expressions[key] = expressions[name]
+                accessor = self._formatted(key, field)
+            else:
+                accessor = self._compile(name, field)
+            if accessor is None:
+                raise LookupError(name)
+            self.accessors.append((name, accessor))
+
+    def _compile(self, name, field):
+        if field.source == "*":
+            return None
+        lookup = field.source.replace(".", "__")
+
+        if isinstance(field, serializers.ManyRelatedField):
+            return self._related_objects(name, lookup, field.child_relation)
+        if isinstance(field, serializers.ListSerializer):
+            return self._related_rows(name, lookup, field.child)
+        if isinstance(field, serializers.SlugRelatedField):
+            lookup = f"{lookup}__{field.slug_field}"
+            if _resolve(self.model, lookup) is None:
+                return None
+            return self._raw(lookup)
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            model_field = _resolve(self.model, lookup)
+            if model_field is None or not model_field.many_to_one:
+                return None
+            return self._raw(lookup)
+        if isinstance(field, serializers.RelatedField):
+            return None
+        if isinstance(field, serializers.BaseSerializer):
+            return None
+
+        model_field = _resolve(self.model, lookup)
+        if model_field is None or model_field.is_relation:
+            return None
+        if isinstance(model_field, FileField):
+            return self._formatted(lookup, field, model_field)
+        return self._formatted(lookup, field)
+
+    def _raw(self, key):
+        self.lookups.add(key)
+        return lambda row: row[key]
+
+    def _formatted(self, key, field, file_field=None):
+        if key not in self.expressions:
+            self.lookups.add(key)
+        to_representation = field.to_representation
+
+        if file_field is not None:
+            def accessor(row):
+                name = row[key]
+                if name is None:
+                    return None
+                return to_representation(
+                    file_field.attr_class(None, file_field, name)
+                )
+            return accessor
+
+        def accessor(row):
+            value = row[key]
+            if value is None:
+                return None
+            return to_representation(value)
+        return accessor
+
+    def _relation(self, lookup):
+        """Related model and the name filtering it by owners of this model"""
+        model_field = _resolve(self.model, lookup)
+        if model_field is None or "__" in lookup:
+            return None, None
+        if model_field.many_to_many and not model_field.auto_created:
+            return model_field.related_model, model_field.related_query_name()
+        if model_field.one_to_many or model_field.many_to_many:
+            return model_field.related_model, model_field.field.name
+        return None, None
+
+    def _related_objects(self, name, lookup, child_relation):
+        related_model, owner = self._relation(lookup)
+        if related_model is None:
+            return None
+        to_representation = child_relation.to_representation
+
+        def load(ids):
+            related = defaultdict(list)
+            for instance in related_model.objects.filter(
+                **{f"{owner}__in": ids}
+            ).annotate(_owner=F(f"{owner}__pk")):
+                related[instance._owner].append(
+                    to_representation(instance)
+                )
+            return related
+
+        self.loaders[name] = load
+        return self._loaded(name)
+
+    def _related_rows(self, name, lookup, child):
+        related_model, owner = self._relation(lookup)
+        if related_model is None or not hasattr(child, "Meta"):
+            return None
+        try:
+            plan = ValuesPlan(child)
+        except LookupError:
+            return None
+
+        def load(ids):
+            related = defaultdict(list)
+            rows = related_model.objects.filter(
+                **{f"{owner}__in": ids}
+            ).values(*plan.lookups, _owner=F(owner), **plan.expressions)
+            for item in plan.build(rows):
+                related[item.pop("_owner")].append(item)
+            return related
+
+        plan.accessors.append(("_owner", lambda row: row["_owner"]))
+        self.loaders[name] = load
+        return self._loaded(name)
+
+    def _loaded(self, name):
+        pk = self.pk
+        return lambda row: self.related[name].get(row[pk], [])
+
+    def queryset(self, queryset, keep=()):
+        """``queryset`` narrowed to the values this plan reads"""
+        return (
+            queryset
+            .select_related(None)
+            .prefetch_related(None)
+            .values(
+                *self.lookups, *(set(keep) - self.lookups), **self.expressions
+            )
+        )
+
+    def build(self, rows):
+        rows = list(rows)
+        ids = [row[self.pk] for row in rows]
+        self.related = {
+            name: load(ids) if ids else {}
+            for name, load in self.loaders.items()
+        }
+        accessors = self.accessors
+        return [
+            {name: accessor(row) for name, accessor in accessors}
+            for row in rows
+        ]
+
+
+class ValuesListMixin:
+    """
+    Serves the list action through a ``ValuesPlan`` of the list serializer
+    when every one of its fields can be read from ``values()``; the
+    output is identical to the serializer's
+    """
+    values_fast_path = True
+
+    def get_values_plan(self):
+        serializer = self.get_serializer_class()(
+            context=self.get_serializer_context()
+        )
+        try:
+            return ValuesPlan(serializer)
+        except LookupError:
+            return None
+
+    def list(self, request, *args, **kwargs):
+        plan = self.get_values_plan() if self.values_fast_path else None
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        # cursor pagination reads its position off the last row
+        ordering = getattr(self.paginator, "ordering", ())
+        queryset = plan.queryset(
+            self.filter_queryset(self.get_queryset()),
+            keep=[field.lstrip("-") for field in ordering],
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(plan.build(page))
+        return Response(plan.build(queryset))
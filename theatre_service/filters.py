@@ -0,0 +1,64 @@
+"""Query param filters shared by the sync and async performance views"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+
+def day_start(day):
+    """Midnight opening ``day`` in the TIME_ZONE of the project"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def date_param(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValidationError({name: "Date must be in YYYY-MM-DD format."})
+
+
+def is_upcoming(params):
+    return params.get("upcoming", "").lower() in ("1", "true", "yes")
+
+
+def show_time_range(params):
+    """
+    Folds ``date``, ``date_from``, ``date_to`` (all inclusive days) and
+    ``upcoming`` into one half-open [start, end) range on show_time
+    that the show_time index can seek, unlike show_time__date
+    """
+    starts, ends = [], []
+    for name, opens, closes in (
+        ("date", True, True),
+        ("date_from", True, False),
+        ("date_to", False, True),
+    ):
+        day = date_param(params, name)
+        if day and opens:
+            starts.append(day_start(day))
+        if day and closes:
+            ends.append(day_start(day + timedelta(days=1)))
+
+    if is_upcoming(params):
+        starts.append(timezone.now())
+    return max(starts, default=None), min(ends, default=None)
+
+
+def filter_performances(queryset, params):
+    play_id_str = params.get("play")
+
+    start, end = show_time_range(params)
+    if start:
+        queryset = queryset.filter(show_time__gte=start)
+    if end:
+        queryset = queryset.filter(show_time__lt=end)
+
+    if play_id_str:
+        if not play_id_str.isdigit():
+            raise ValidationError({"play": "Must be a play id."})
+        queryset = queryset.filter(play_id=int(play_id_str))
+
+    return queryset
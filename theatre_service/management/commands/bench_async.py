@@ -0,0 +1,106 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+from theatre.authentication import VersionedAccessToken
+from theatre_service.models import Performance
+
+ENDPOINTS = {
+    "list": ("performance-list", False),
+    "detail": ("performance-detail", True),
+    "seats": ("performance-seats", True),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests a schedule endpoint in-process, comparing the sync view "
+        "on a thread pool (the WSGI path) with the async view on one event "
+        "loop (the ASGI path)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--endpoint", choices=sorted(ENDPOINTS), default="list"
+        )
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=20)
+
+    def _urls(self, endpoint):
+        performance = Performance.objects.order_by("pk").first()
+        if performance is None:
+            raise CommandError("There are no performances to request.")
+        name, detail = ENDPOINTS[endpoint]
+        args = [performance.pk] if detail else []
+        return (
+            reverse(f"theatre-api:{name}", args=args),
+            reverse(f"theatre-api:async-{name}", args=args),
+        )
+
+    def _headers(self):
+        user = get_user_model().objects.filter(is_active=True).first()
+        if user is None:
+            raise CommandError("There is no active user to authenticate as.")
+        token = VersionedAccessToken.for_user(user)
+        return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    def _run_sync(self, url, headers, requests, concurrency):
+        def request(_):
+            started = time.perf_counter()
+            response = Client().get(url, **headers)
+            assert response.status_code == 200, response.status_code
+            return time.perf_counter() - started
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            return list(executor.map(request, range(requests)))
+
+    def _run_async(self, url, headers, requests, concurrency):
+        # the async test client of Django 4.0 sends extra kwargs as headers
+        scope_headers = {"authorization": headers["HTTP_AUTHORIZATION"]}
+
+        async def run():
+            client = AsyncClient()
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def request():
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.get(url, **scope_headers)
+                    assert response.status_code == 200, response.status_code
+                    return time.perf_counter() - started
+
+            return await asyncio.gather(
+                *(request() for _ in range(requests))
+            )
+
+        return asyncio.run(run())
+
+    def _report(self, name, run, *args):
+        started = time.perf_counter()
+        latencies = sorted(run(*args))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{name:<6} {len(latencies) / elapsed:8.1f} req/s  "
+            f"p50 {statistics.median(latencies) * 1000:7.2f} ms  "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:7.2f} ms"
+        )
+
+    def handle(self, *args, **options):
+        sync_url, async_url = self._urls(options["endpoint"])
+        headers = self._headers()
+        load = (headers, options["requests"], options["concurrency"])
+
+        self.stdout.write(
+            f"{options['requests']} requests, "
+            f"{options['concurrency']} concurrent"
+        )
+        # the test clients send requests for the "testserver" host
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            self._report("wsgi", self._run_sync, sync_url, *load)
+            self._report("asgi", self._run_async, async_url, *load)
@@ -0,0 +1,107 @@
+import io
+import timeit
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from theatre.parsers import FastJSONParser
+from theatre.renderers import FastJSONRenderer, orjson
+from theatre_service.models import Performance, Play, TheatreHall
+from theatre_service.serializers import PerformanceListSerializer
+
+
+def _page(results):
+    return {
+        "count": len(results),
+        "next": "http://testserver/api/theatre/?page=2",
+        "previous": None,
+        "results": results,
+    }
+
+
+def performance_page(rows):
+    hall = TheatreHall(id=1, name="Blue", rows=15, seats_in_row=20)
+    hall.capacity = hall.rows * hall.seats_in_row
+    start = timezone.now()
+    performances = [
+        Performance(
+            id=index,
+            play=Play(id=index % 50, title=f"Play {index % 50}"),
+            theatre_hall=hall,
+            show_time=start + timedelta(hours=index),
+            tickets_sold=index % hall.capacity,
+        )
+        for index in range(1, rows + 1)
+    ]
+    return _page(PerformanceListSerializer(performances, many=True).data)
+
+
+def play_page(rows):
+    return _page([
+        {
+            "id": index,
+            "title": f"Play {index}",
+            "description": "Lorem ipsum dolor sit amet. " * 20,
+            "duration": 90 + index % 60,
+            "actors": [f"Actor {index + offset}" for offset in range(6)],
+            "genres": ["Drama", "Comedy"],
+            "image": f"http://testserver/media/uploads/plays/{index}.jpg",
+        }
+        for index in range(1, rows + 1)
+    ])
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the stock DRF JSON renderer and parser with the "
+        "project ones on large performance and play pages"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def _time(self, func, repeat):
+        return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+    def _bench(self, name, data, repeat):
+        stock_renderer, stock_parser = JSONRenderer(), JSONParser()
+        body = stock_renderer.render(data)
+        timings = {
+            "stock": (
+                self._time(lambda: stock_renderer.render(data), repeat),
+                self._time(
+                    lambda: stock_parser.parse(io.BytesIO(body)), repeat
+                ),
+            )
+        }
+        backends = ["json", "orjson"] if orjson is not None else ["json"]
+        renderer, parser = FastJSONRenderer(), FastJSONParser()
+        for backend in backends:
+            with override_settings(JSON_BACKEND=backend):
+                timings[backend] = (
+                    self._time(lambda: renderer.render(data), repeat),
+                    self._time(
+                        lambda: parser.parse(io.BytesIO(body)), repeat
+                    ),
+                )
+
+        self.stdout.write(f"{name}: {len(body) / 1024:.0f} KiB")
+        stock_render, stock_parse = timings["stock"]
+        for backend, (render, parse) in timings.items():
+            self.stdout.write(
+                f"  {backend:<8} render {render:8.2f} ms "
+                f"({stock_render / render:4.1f}x)  "
+                f"parse {parse:8.2f} ms ({stock_parse / parse:4.1f}x)"
+            )
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        self._bench(
+            f"performance page, {rows} rows", performance_page(rows), repeat
+        )
+        self._bench(f"play page, {rows} rows", play_page(rows), repeat)
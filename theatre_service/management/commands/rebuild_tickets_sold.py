@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from theatre_service.models import Performance
+
+
+class Command(BaseCommand):
+    help = "Recounts Performance.tickets_sold from the Ticket table"
+
+    def handle(self, *args, **options):
+        updated = Performance.rebuild_tickets_sold()
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt counters for {updated} performances")
+        )
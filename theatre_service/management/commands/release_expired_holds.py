@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from theatre_service.models import SeatHold
+from theatre_service.reservations import release_holds
+
+
+class Command(BaseCommand):
+    help = "Deletes expired seat holds in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        released = 0
+        while True:
+            batch = list(
+                SeatHold.objects
+                .filter(expires_at__lte=now)
+                .values_list("pk", flat=True)[:options["batch_size"]]
+            )
+            if not batch:
+                break
+            released += release_holds(SeatHold.objects.filter(pk__in=batch))
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Released {released} expired seat holds")
+        )
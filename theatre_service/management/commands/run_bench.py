@@ -0,0 +1,71 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.utils import timezone
+
+from theatre_service.benchmarks import BENCH_CACHES, dataset_size, run_cases
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the list, retrieve and create actions of every viewset "
+        "against the seed_bench dataset and reports query counts, p50/p95 "
+        "latency and peak memory. Writes are rolled back at the end"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=30)
+        parser.add_argument(
+            "--case",
+            action="append",
+            dest="cases",
+            help="Run only this case, e.g. performance-list (repeatable)",
+        )
+        parser.add_argument(
+            "--format", choices=("text", "json"), default="text"
+        )
+        parser.add_argument(
+            "--output", help="Write the JSON report to this file as well"
+        )
+
+    def _write_table(self, results):
+        self.stdout.write(
+            f"{'case':<24} {'queries':>7} {'p50 ms':>9} {'p95 ms':>9} "
+            f"{'peak KiB':>9}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['name']:<24} {result['queries']:>7} "
+                f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                f"{result['peak_memory_kib']:>9.1f}"
+            )
+
+    def handle(self, *args, **options):
+        started_at = timezone.now()
+        # the test client sends requests for the "testserver" host
+        with override_settings(
+            ALLOWED_HOSTS=["testserver"], CACHES=BENCH_CACHES
+        ), transaction.atomic():
+            dataset = dataset_size()
+            try:
+                results = run_cases(options["repeat"], options["cases"])
+            except LookupError as error:
+                raise CommandError(error)
+            transaction.set_rollback(True)
+
+        report = {
+            "started_at": started_at.isoformat(),
+            "database": connection.vendor,
+            "dataset": dataset,
+            "repeat": options["repeat"],
+            "results": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent=2)
+        if options["format"] == "json":
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._write_table(results)
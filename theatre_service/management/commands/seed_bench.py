@@ -0,0 +1,42 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from theatre_service.benchmarks import DEFAULT_VOLUMES, clear, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-inserts a benchmark dataset of actors, genres, plays, halls, "
+        "performances, users, reservations and tickets"
+    )
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_VOLUMES.items():
+            parser.add_argument(
+                f"--{name.replace('_', '-')}", type=int, default=default
+            )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed of the random choices"
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete the rows of an earlier seed_bench run first",
+        )
+
+    def handle(self, *args, **options):
+        volumes = {name: options[name] for name in DEFAULT_VOLUMES}
+        with transaction.atomic():
+            if options["clear"]:
+                clear()
+            inserted = seed(
+                volumes,
+                batch_size=options["batch_size"],
+                rng=random.Random(options["seed"]),
+            )
+        for label, count in inserted.items():
+            self.stdout.write(f"{label:<32} {count:>9}")
+        self.stdout.write(self.style.SUCCESS("Benchmark data seeded"))
@@ -0,0 +1,93 @@
+# Generated by Django 4.0.4 on 2026-10-18 02:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import theatre_service.models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Actor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_name', models.CharField(max_length=255)),
+                ('last_name', models.CharField(max_length=255)),
+            ],
+            options={
+                'ordering': ['last_name'],
+                'unique_together': {('first_name', 'last_name')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Reservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TheatreHall',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('seats_in_row', models.PositiveIntegerField()),
+                ('rows', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Play',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255, unique=True)),
+                ('image', models.ImageField(null=True, upload_to=theatre_service.models.play_image_file_path)),
+                ('description', models.TextField(max_length=1000)),
+                ('duration', models.IntegerField(blank=True, null=True)),
+                ('actors', models.ManyToManyField(related_name='plays', to='theatre_service.actor')),
+                ('genres', models.ManyToManyField(related_name='plays', to='theatre_service.genre')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Performance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('show_time', models.DateTimeField()),
+                ('play', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='theatre_service.play')),
+                ('theatre_hall', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='theatre_service.theatrehall')),
+            ],
+            options={
+                'ordering': ['-show_time'],
+                'unique_together': {('play', 'show_time', 'theatre_hall')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Ticket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row', models.IntegerField()),
+                ('seat', models.IntegerField()),
+                ('performance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tickets', to='theatre_service.performance')),
+                ('reservation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tickets', to='theatre_service.reservation')),
+            ],
+            options={
+                'ordering': ['reservation'],
+                'unique_together': {('row', 'seat', 'performance')},
+            },
+        ),
+    ]
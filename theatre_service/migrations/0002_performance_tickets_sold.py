@@ -0,0 +1,35 @@
+# Generated by Django 4.0.4 on 2026-10-18 02:53
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_tickets_sold(apps, schema_editor):
+    Performance = apps.get_model("theatre_service", "Performance")
+    Ticket = apps.get_model("theatre_service", "Ticket")
+    sold = (
+        Ticket.objects
+        .filter(performance=OuterRef("pk"))
+        .order_by()
+        .values("performance")
+        .annotate(sold=Count("id"))
+        .values("sold")
+    )
+    Performance.objects.update(tickets_sold=Coalesce(Subquery(sold), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('theatre_service', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='performance',
+            name='tickets_sold',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_tickets_sold, migrations.RunPython.noop),
+    ]
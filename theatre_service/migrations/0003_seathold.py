@@ -0,0 +1,31 @@
+# Generated by Django 4.0.4 on 2026-10-18 02:57
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('theatre_service', '0002_performance_tickets_sold'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row', models.IntegerField()),
+                ('seat', models.IntegerField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('performance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_holds', to='theatre_service.performance')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_holds', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['expires_at'],
+                'unique_together': {('row', 'seat', 'performance')},
+            },
+        ),
+    ]
@@ -0,0 +1,87 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+POSTGRES_INDEXES = {
+    "theatre_service_play_search_idx": (
+        "theatre_service_play USING gin (("
+        "setweight(to_tsvector('english'::regconfig, title), 'A') || "
+        "setweight(to_tsvector('english'::regconfig, description), 'B')"
+        "))"
+    ),
+    "theatre_service_actor_name_trgm_idx": (
+        "theatre_service_actor USING gin "
+        "((first_name || ' ' || last_name) gin_trgm_ops)"
+    ),
+    "theatre_service_genre_name_trgm_idx": (
+        "theatre_service_genre USING gin (name gin_trgm_ops)"
+    ),
+}
+
+FTS_TABLES = {
+    "theatre_service_play": ("title", "description"),
+    "theatre_service_actor": ("first_name", "last_name"),
+    "theatre_service_genre": ("name",),
+}
+
+
+def sqlite_fts_statements(table, columns):
+    fts_table = f"{table}_fts"
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    delete = (
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    insert = (
+        f"INSERT INTO {fts_table}(rowid, {column_list}) "
+        f"VALUES (new.id, {new_values});"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE {fts_table} USING fts5({column_list}, "
+        f"content='{table}', content_rowid='id')",
+        f"CREATE TRIGGER {fts_table}_ai AFTER INSERT ON {table} "
+        f"BEGIN {insert} END",
+        f"CREATE TRIGGER {fts_table}_ad AFTER DELETE ON {table} "
+        f"BEGIN {delete} END",
+        f"CREATE TRIGGER {fts_table}_au AFTER UPDATE ON {table} "
+        f"BEGIN {delete} {insert} END",
+        f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')",
+    ]
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        for name, definition in POSTGRES_INDEXES.items():
+            schema_editor.execute(f"CREATE INDEX {name} ON {definition}")
+    elif vendor == "sqlite":
+        for table, columns in FTS_TABLES.items():
+            for statement in sqlite_fts_statements(table, columns):
+                schema_editor.execute(statement)
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        for name in POSTGRES_INDEXES:
+            schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+    elif vendor == "sqlite":
+        for table in FTS_TABLES:
+            for suffix in ("ai", "ad", "au"):
+                schema_editor.execute(
+                    f"DROP TRIGGER IF EXISTS {table}_fts_{suffix}"
+                )
+            schema_editor.execute(f"DROP TABLE IF EXISTS {table}_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre_service", "0003_seathold"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
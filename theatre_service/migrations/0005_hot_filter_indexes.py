@@ -0,0 +1,26 @@
+# Generated by Django 4.0.4 on 2026-10-18 03:08
+
+from django.db import migrations, models
+import django.db.models.expressions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('theatre_service', '0004_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='performance',
+            index=models.Index(fields=['show_time'], name='performance_show_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user', 'created_at'], name='reservation_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='theatrehall',
+            index=models.Index(django.db.models.expressions.CombinedExpression(django.db.models.expressions.F('seats_in_row'), '*', django.db.models.expressions.F('rows')), name='theatrehall_capacity_idx'),
+        ),
+    ]
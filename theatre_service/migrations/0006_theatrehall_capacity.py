@@ -0,0 +1,39 @@
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_capacity(apps, schema_editor):
+    TheatreHall = apps.get_model("theatre_service", "TheatreHall")
+    TheatreHall.objects.update(capacity=F("seats_in_row") * F("rows"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theatre_service", "0005_hot_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="theatrehall",
+            name="theatrehall_capacity_idx",
+        ),
+        migrations.AddField(
+            model_name="theatrehall",
+            name="capacity",
+            field=models.PositiveIntegerField(
+                db_index=True, default=0, editable=False
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_capacity, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="theatrehall",
+            constraint=models.CheckConstraint(
+                check=models.Q(
+                    ("capacity", F("seats_in_row") * F("rows"))
+                ),
+                name="theatrehall_capacity_matches_size",
+            ),
+        ),
+    ]
@@ -3,6 +3,8 @@ import uuid
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.text import slugify
 
 
@@ -52,10 +54,25 @@ class TheatreHall(models.Model):
     name = models.CharField(max_length=255, unique=True)
     seats_in_row = models.PositiveIntegerField()
     rows = models.PositiveIntegerField()
+    # seats_in_row * rows, stored so the capacity filter can use an index
+    capacity = models.PositiveIntegerField(editable=False, db_index=True)
 
-    @property
-    def capacity(self) -> int:
-        return self.seats_in_row * self.rows
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(capacity=F("seats_in_row") * F("rows")),
+                name="theatrehall_capacity_matches_size",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.capacity = self.seats_in_row * self.rows
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and (
+            {"seats_in_row", "rows"} & set(update_fields)
+        ):
+            kwargs["update_fields"] = {*update_fields, "capacity"}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.name}"
@@ -65,10 +82,50 @@ class Performance(models.Model):
     play = models.ForeignKey(Play, on_delete=models.CASCADE)
     theatre_hall = models.ForeignKey(TheatreHall, on_delete=models.CASCADE)
     show_time = models.DateTimeField()
+    tickets_sold = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["-show_time"]
         unique_together = ("play", "show_time", "theatre_hall")
+        # the ``play`` filter is served by the unique (play, show_time, ...)
+        # index; this one covers the default ordering and the date filter
+        indexes = [
+            models.Index(
+                fields=["show_time"], name="performance_show_time_idx"
+            ),
+        ]
+
+    @property
+    def tickets_available(self) -> int:
+        return self.theatre_hall.capacity - self.tickets_sold
+
+    @staticmethod
+    def change_tickets_sold(sold_by_performance):
+        """
+        Applies {performance_id: delta} to the stored sold-seat counters.
+        Rows are updated in id order so concurrent reservations
+        touching the same performances lock them in the same order
+        """
+        for performance_id, delta in sorted(sold_by_performance.items()):
+            if delta:
+                Performance.objects.filter(pk=performance_id).update(
+                    tickets_sold=F("tickets_sold") + delta
+                )
+
+    @staticmethod
+    def rebuild_tickets_sold():
+        """Recounts every sold-seat counter from the Ticket table"""
+        sold = (
+            Ticket.objects
+            .filter(performance=OuterRef("pk"))
+            .order_by()
+            .values("performance")
+            .annotate(sold=Count("id"))
+            .values("sold")
+        )
+        return Performance.objects.update(
+            tickets_sold=Coalesce(Subquery(sold), 0)
+        )
 
     def __str__(self):
         return f"{self.play.title} at {self.show_time.strftime('%Y-%m-%d %H:%M')}"
@@ -78,6 +135,14 @@ class Reservation(models.Model):
     user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "created_at"],
+                name="reservation_user_created_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.created_at.strftime('%Y-%m-%d %H:%M')} {self.user}"
 
@@ -100,6 +165,14 @@ class Ticket(models.Model):
         ordering = ["reservation"]
         unique_together = ("row", "seat", "performance")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        ticket = super().from_db(db, field_names, values)
+        # lets a save moving the ticket update the counters of both
+        # performances, see signals.count_sold_ticket
+        ticket._loaded_performance_id = ticket.__dict__.get("performance_id")
+        return ticket
+
     @staticmethod
     def validate_tickets(row, seat, theatre_hall, error_to_raise):
         for ticket_attr_value, ticket_attr_name, theatre_hall_attr_name in [
@@ -111,7 +184,7 @@ class Ticket(models.Model):
             )
             if not (1 <= ticket_attr_value <= theatre_hall_attr_value):
                 raise error_to_raise(
-                    f"{ticket_attr_name} with value {ticket_attr_name}"
+                    f"{ticket_attr_name} with value {ticket_attr_value} "
                     f"must be in range from 1 to {theatre_hall_attr_value}"
                 )
 
@@ -125,3 +198,26 @@ class Ticket(models.Model):
 
     def __str__(self):
         return f"{self.row} {self.seat}"
+
+
+class SeatHold(models.Model):
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    performance = models.ForeignKey(
+        Performance,
+        on_delete=models.CASCADE,
+        related_name="seat_holds"
+    )
+    user = models.ForeignKey(
+        get_user_model(),
+        on_delete=models.CASCADE,
+        related_name="seat_holds"
+    )
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ["expires_at"]
+        unique_together = ("row", "seat", "performance")
+
+    def __str__(self):
+        return f"{self.row} {self.seat} until {self.expires_at}"
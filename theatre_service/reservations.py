@@ -0,0 +1,193 @@
+import random
+import time
+from collections import Counter
+
+from django.db import IntegrityError, OperationalError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from theatre_service.caching import bump_model_version
+from theatre_service.models import Performance, Reservation, SeatHold, Ticket
+from theatre_service.seat_map import invalidate_seat_maps
+
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 0.05
+# serialization_failure and deadlock_detected
+TRANSIENT_PGCODES = {"40001", "40P01"}
+
+
+class SeatsTaken(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the requested seats are already taken."
+    default_code = "seats_taken"
+
+    def __init__(self, seats, detail=None):
+        super().__init__(detail)
+        # seat coordinates stay integers instead of being coerced to
+        # ErrorDetail strings like the rest of an APIException detail
+        self.detail = {
+            "detail": self.detail,
+            "taken_seats": [
+                {"performance": performance_id, "row": row, "seat": seat}
+                for performance_id, row, seat in sorted(seats)
+            ],
+        }
+
+
+def requested_seats(tickets_data):
+    return {
+        (ticket["performance"].id, ticket["row"], ticket["seat"])
+        for ticket in tickets_data
+    }
+
+
+def _seats_in(queryset, seats):
+    return set(
+        queryset.filter(
+            performance_id__in={pk for pk, _, _ in seats},
+            row__in={row for _, row, _ in seats},
+            seat__in={seat for _, _, seat in seats},
+        ).values_list("performance_id", "row", "seat")
+    ) & seats
+
+
+def find_taken_seats(seats):
+    """Returns the (performance_id, row, seat) triples that have tickets"""
+    return _seats_in(Ticket.objects.all(), seats)
+
+
+def find_held_seats(seats, user):
+    """Returns the triples under an active hold of somebody but ``user``"""
+    return _seats_in(
+        SeatHold.objects.filter(expires_at__gt=timezone.now()).exclude(
+            user=user
+        ),
+        seats,
+    )
+
+
+def _is_transient(error):
+    pgcode = getattr(error.__cause__, "pgcode", None)
+    return pgcode in TRANSIENT_PGCODES or "database is locked" in str(error)
+
+
+def _lock_performances(seats):
+    # Every write for a performance queues on its row lock, taken in id
+    # order so orders spanning several performances cannot deadlock
+    list(
+        Performance.objects
+        .select_for_update()
+        .filter(pk__in={pk for pk, _, _ in seats})
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def _check_free(seats, user):
+    taken_seats = find_taken_seats(seats)
+    if taken_seats:
+        raise SeatsTaken(taken_seats)
+    held_seats = find_held_seats(seats, user)
+    if held_seats:
+        raise SeatsTaken(
+            held_seats,
+            "Some of the requested seats are held by another user.",
+        )
+
+
+def _with_retries(write, tickets_data, user):
+    """
+    Runs ``write`` in its own transaction, answering 409 with the taken
+    seats on conflict. Serialization failures and deadlocks are retried
+    with jittered exponential backoff unless an outer transaction is
+    already open, as it could not be replayed from here
+    """
+    seats = requested_seats(tickets_data)
+    attempts = MAX_ATTEMPTS
+    if transaction.get_connection().in_atomic_block:
+        attempts = 1
+    for attempt in range(1, attempts + 1):
+        try:
+            with transaction.atomic():
+                _lock_performances(seats)
+                _check_free(seats, user)
+                return write()
+        except IntegrityError:
+            # a seat was taken by a writer that bypassed the row lock
+            _check_free(seats, user)
+            if attempt == attempts:
+                raise
+        except OperationalError as error:
+            if attempt == attempts or not _is_transient(error):
+                raise
+        time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1) * random.uniform(1, 2))
+
+
+def reserve_tickets(tickets_data, **reservation_data):
+    """
+    Creates a reservation with its tickets. Seats held by the reserving
+    user are converted: their holds are released in the same transaction
+    """
+    user = reservation_data["user"]
+
+    def write():
+        reservation = Reservation.objects.create(**reservation_data)
+        tickets = Ticket.objects.bulk_create(
+            Ticket(reservation=reservation, **ticket_data)
+            for ticket_data in tickets_data
+        )
+        release_holds(
+            SeatHold.objects.filter(user=user),
+            requested_seats(tickets_data),
+        )
+        sold = Counter(ticket.performance_id for ticket in tickets)
+        Performance.change_tickets_sold(sold)
+        invalidate_seat_maps(sold)
+        bump_model_version(Ticket)
+        return reservation
+
+    return _with_retries(write, tickets_data, user)
+
+
+def hold_seats(tickets_data, user, expires_at):
+    """
+    Holds free seats for ``user`` until ``expires_at`` without touching
+    the Ticket table; the user's own holds on the same seats are renewed
+    """
+    seats = requested_seats(tickets_data)
+
+    def write():
+        release_holds(
+            SeatHold.objects.filter(expires_at__lte=timezone.now()), seats
+        )
+        release_holds(SeatHold.objects.filter(user=user), seats)
+        holds = SeatHold.objects.bulk_create(
+            SeatHold(user=user, expires_at=expires_at, **ticket_data)
+            for ticket_data in tickets_data
+        )
+        invalidate_seat_maps(pk for pk, _, _ in seats)
+        return holds
+
+    return _with_retries(write, tickets_data, user)
+
+
+def release_holds(queryset, seats=None):
+    """Deletes the holds in ``queryset``, narrowed to ``seats`` if given"""
+    if seats is not None:
+        queryset = queryset.filter(
+            performance_id__in={pk for pk, _, _ in seats},
+            row__in={row for _, row, _ in seats},
+            seat__in={seat for _, _, seat in seats},
+        )
+    holds = {
+        hold_id: (performance_id, row, seat)
+        for hold_id, performance_id, row, seat in queryset.values_list(
+            "id", "performance_id", "row", "seat"
+        )
+        if seats is None or (performance_id, row, seat) in seats
+    }
+    if holds:
+        SeatHold.objects.filter(pk__in=holds).delete()
+        invalidate_seat_maps(pk for pk, _, _ in holds.values())
+    return len(holds)
@@ -0,0 +1,150 @@
+"""
+Ranked catalog search behind the ``search`` query param.
+
+PostgreSQL matches plays against a GIN-indexed weighted ``tsvector`` of
+title and description, and actors and genres against GIN trigram indexes
+on their names. SQLite (DEBUG mode) uses FTS5 tables kept in sync by triggers.
+The indexes are created by migration 0004_search_indexes; the
+expressions below must stay identical to the indexed ones.
+"""
+import re
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVectorField,
+)
+from django.db import connection
+from django.db.models import BooleanField, F, FloatField, Func, Q, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = "english"
+
+
+class WeightedVector(Func):
+    template = (
+        f"setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, "
+        "%(expressions)s), '%(weight)s')"
+    )
+    output_field = SearchVectorField()
+
+
+class VectorConcat(Func):
+    template = "(%(expressions)s)"
+    arg_joiner = " || "
+    output_field = SearchVectorField()
+
+
+def play_document():
+    """Title matches (weight A) rank above description matches (B)"""
+    return VectorConcat(
+        WeightedVector(F("title"), weight="A"),
+        WeightedVector(F("description"), weight="B"),
+    )
+
+
+class JoinedWords(Func):
+    """Space separated ``||`` concatenation, immutable so it can be indexed"""
+    template = "(%(expressions)s)"
+    arg_joiner = " || ' ' || "
+
+
+class WordSimilar(Func):
+    template = "%(expressions)s"
+    arg_joiner = " <%% "
+    output_field = BooleanField()
+
+
+class WordSimilarity(Func):
+    function = "word_similarity"
+    output_field = FloatField()
+
+
+def _words(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def _fts_rank(queryset, text, weights):
+    """Filters by an FTS5 prefix match and annotates the negated bm25"""
+    table = queryset.model._meta.db_table
+    fts_table = f"{table}_fts"
+    weights = ", ".join(str(weight) for weight in weights)
+    match = " ".join(f'"{word}"*' for word in _words(text))
+    return queryset.filter(
+        id__in=RawSQL(
+            f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH %s",
+            (match,),
+        )
+    ).annotate(
+        rank=RawSQL(
+            f"SELECT -bm25({fts_table}, {weights}) FROM {fts_table} "
+            f"WHERE {fts_table} MATCH %s "
+            f'AND {fts_table}.rowid = "{table}"."id"',
+            (match,),
+            output_field=FloatField(),
+        )
+    )
+
+
+def _trigram_rank(queryset, text, expression):
+    return queryset.filter(
+        WordSimilar(Value(text), expression)
+    ).annotate(rank=WordSimilarity(Value(text), expression))
+
+
+def _rank(queryset, text, postgres_rank, fields):
+    """
+    ``fields`` maps the searched columns to their weight in the SQLite
+    ranking; other backends fall back to icontains on the same columns
+    """
+    if not _words(text):
+        return queryset.none()
+    if connection.vendor == "postgresql":
+        queryset = postgres_rank(queryset, text)
+    elif connection.vendor == "sqlite":
+        queryset = _fts_rank(queryset, text, fields.values())
+    else:
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f"{field}__icontains": text})
+        queryset = queryset.filter(condition).annotate(
+            rank=Value(0.0, output_field=FloatField())
+        )
+    return queryset.order_by("-rank", "pk")
+
+
+def _play_rank(queryset, text):
+    query = SearchQuery(
+        " & ".join(f"{word}:*" for word in _words(text)),
+        config=SEARCH_CONFIG,
+        search_type="raw",
+    )
+    return queryset.alias(
+        document=play_document()
+    ).filter(document=query).annotate(rank=SearchRank(F("document"), query))
+
+
+def search_plays(queryset, text):
+    return _rank(
+        queryset, text, _play_rank, {"title": 10.0, "description": 1.0}
+    )
+
+
+def search_actors(queryset, text):
+    return _rank(
+        queryset,
+        text,
+        lambda queryset, text: _trigram_rank(
+            queryset, text, JoinedWords(F("first_name"), F("last_name"))
+        ),
+        {"first_name": 1.0, "last_name": 1.0},
+    )
+
+
+def search_genres(queryset, text):
+    return _rank(
+        queryset,
+        text,
+        lambda queryset, text: _trigram_rank(queryset, text, F("name")),
+        {"name": 1.0},
+    )
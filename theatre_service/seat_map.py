@@ -0,0 +1,98 @@
+import base64
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from theatre_service.models import SeatHold, Ticket
+
+SEAT_MAP_CACHE_KEY = "seat_map:{}"
+SEAT_MAP_CACHE_TIMEOUT = 60 * 60
+
+
+def _in_hall(seats, hall):
+    """
+    Drops the seats a hall resized after they were sold or held no
+    longer has
+    """
+    return [
+        (row, seat)
+        for row, seat in seats
+        if row <= hall.rows and seat <= hall.seats_in_row
+    ]
+
+
+def _encode(seats, seats_in_row, capacity):
+    """
+    Encodes seats as a row-major bitmap, one bit per seat, most
+    significant bit first
+    """
+    bitmap = bytearray((capacity + 7) // 8)
+    for row, seat in seats:
+        index = (row - 1) * seats_in_row + seat - 1
+        bitmap[index // 8] |= 0x80 >> (index % 8)
+    return base64.b64encode(bitmap).decode()
+
+
+def build_seat_map(performance):
+    """
+    Returns the seat map of the performance with the number of seconds
+    it stays valid, which is cut short by the first hold to expire
+    """
+    hall = performance.theatre_hall
+    capacity = hall.capacity
+    taken = _in_hall(
+        Ticket.objects.filter(
+            performance=performance
+        ).values_list("row", "seat"),
+        hall,
+    )
+    now = timezone.now()
+    holds = list(
+        SeatHold.objects.filter(
+            performance=performance, expires_at__gt=now
+        ).values_list("row", "seat", "expires_at")
+    )
+    timeout = min(
+        [SEAT_MAP_CACHE_TIMEOUT]
+        + [(expires_at - now).total_seconds() for _, _, expires_at in holds]
+    )
+
+    seat_map = {
+        "performance": performance.id,
+        "rows": hall.rows,
+        "seats_in_row": hall.seats_in_row,
+        "tickets_available": capacity - len(taken),
+        "encoding": "bitmap",
+        "bitmap": _encode(taken, hall.seats_in_row, capacity),
+        "held": _encode(
+            _in_hall([(row, seat) for row, seat, _ in holds], hall),
+            hall.seats_in_row,
+            capacity,
+        ),
+    }
+    return seat_map, timeout
+
+
+def get_seat_map(performance):
+    key = SEAT_MAP_CACHE_KEY.format(performance.id)
+    seat_map = cache.get(key)
+    hall = performance.theatre_hall
+    if (
+        seat_map is None
+        or seat_map["rows"] != hall.rows
+        or seat_map["seats_in_row"] != hall.seats_in_row
+    ):
+        seat_map, timeout = build_seat_map(performance)
+        cache.set(key, seat_map, timeout)
+    return seat_map
+
+
+def invalidate_seat_maps(performance_ids):
+    """
+    Drops cached maps right away and again after commit, so a map rebuilt
+    by a concurrent reader before the tickets became visible is not kept
+    """
+    keys = [SEAT_MAP_CACHE_KEY.format(pk) for pk in set(performance_ids)]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
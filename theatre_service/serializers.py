@@ -1,5 +1,12 @@
-from django.db import transaction
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.exceptions import ValidationError
 
 from theatre_service.models import (
@@ -10,16 +17,124 @@ from theatre_service.models import (
     Performance,
     Ticket,
     Reservation,
+    SeatHold,
 )
+from theatre_service.reservations import hold_seats, reserve_tickets
+
+
+def _param_set(request, name):
+    """Comma separated query param as a set, None when it is absent"""
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return {item.strip() for item in value.split(",") if item.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    On reads, ``?fields=id,title`` keeps only the listed fields of the top
+    level serializer and ``?expand=play`` nests only the listed relations
+    out of ``expandable_fields``, rendering the others as primary keys.
+    Without ``expand`` every expandable relation stays nested.
+
+    ``field_dependencies`` names the model lookups read by fields that are
+    not backed by a model field of the same source, so that
+    ``trim_queryset`` knows which columns and relations to keep
+    """
+    expandable_fields = ()
+    field_dependencies = {}
+
+    def _is_top_level(self):
+        # the parent of a nested serializer can be the root as well
+        return self.root is self or (
+            isinstance(self.parent, serializers.ListSerializer)
+            and self.parent is self.root
+        )
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        if (
+            request is None
+            or request.method not in SAFE_METHODS
+            or not self._is_top_level()
+        ):
+            return fields
+
+        expand = _param_set(request, "expand")
+        if expand is not None:
+            for name in set(self.expandable_fields) - expand:
+                if name in fields:
+                    many = isinstance(fields[name], serializers.ListSerializer)
+                    fields[name] = serializers.PrimaryKeyRelatedField(
+                        read_only=True, many=many
+                    )
+
+        only = _param_set(request, "fields")
+        if only is not None:
+            fields = {
+                name: field for name, field in fields.items() if name in only
+            }
+        return fields
+
+    @classmethod
+    def trim_queryset(cls, queryset, request, keep=()):
+        """
+        Restricts ``queryset`` to the columns, joins and prefetches the
+        requested fields read. ``keep`` lists extra columns the view needs,
+        like the cursor ordering. Returned unchanged when the request names
+        no ``fields`` or ``expand``, a dependency cannot be resolved or a
+        kept field is a nested serializer, which needs its own prefetches
+        """
+        params = request.query_params
+        if "fields" not in params and "expand" not in params:
+            return queryset
+
+        model = cls.Meta.model
+        columns = {model._meta.pk.name, *keep}
+        joins, prefetches = set(), set()
+        serializer = cls(context={"request": request})
+        for name, field in serializer.fields.items():
+            if name in cls.field_dependencies:
+                lookups = cls.field_dependencies[name]
+            elif field.source == "*" or isinstance(
+                field, serializers.BaseSerializer
+            ):
+                return queryset
+            else:
+                lookups = [field.source.replace(".", "__")]
+
+            for lookup in lookups:
+                attr, _, nested = lookup.partition("__")
+                try:
+                    model_field = model._meta.get_field(attr)
+                except FieldDoesNotExist:
+                    return queryset
+                if model_field.many_to_many or model_field.one_to_many:
+                    prefetches.add(attr)
+                    continue
+                columns.add(attr)
+                pk_only = isinstance(field, serializers.PrimaryKeyRelatedField)
+                if model_field.is_relation and (nested or not pk_only):
+                    joins.add(attr)
+
+        return (
+            queryset
+            .select_related(None)
+            .prefetch_related(None)
+            .select_related(*joins)
+            .prefetch_related(*prefetches)
+            .only(*columns)
+        )
 
 
-class ActorSerializer(serializers.ModelSerializer):
+class ActorSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Actor
         fields = ("id", "first_name", "last_name", "full_name")
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Genre
         fields = ("id", "name",)
@@ -31,7 +146,7 @@ class PlaySerializer(serializers.ModelSerializer):
         fields = ("id", "title", "description", "duration", "actors", "genres")
 
 
-class PlayListSerializer(serializers.ModelSerializer):
+class PlayListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     actors = serializers.SlugRelatedField(
         slug_field="full_name",
         many=True,
@@ -51,10 +166,12 @@ class PlayListSerializer(serializers.ModelSerializer):
         )
 
 
-class PlayDetailSerializer(serializers.ModelSerializer):
+class PlayDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     actors = ActorSerializer(many=True, read_only=True)
     genres = GenreSerializer(many=True, read_only=True)
 
+    expandable_fields = ("actors", "genres")
+
     class Meta:
         model = Play
         fields = (
@@ -69,14 +186,16 @@ class PlayImageSerializer(serializers.ModelSerializer):
         fields = ("id", "image")
 
 
-class TheatreHallSerializer(serializers.ModelSerializer):
+class TheatreHallSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = TheatreHall
         fields = ("id", "name", "seats_in_row", "rows", "capacity")
         read_only_fields = ("capacity",)
 
 
-class TheatreHallListSerializer(serializers.ModelSerializer):
+class TheatreHallListSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer
+):
     class Meta:
         model = TheatreHall
         fields = ("id", "name", "capacity")
@@ -89,7 +208,9 @@ class PerformanceSerializer(serializers.ModelSerializer):
         fields = ("play", "theatre_hall", "show_time")
 
 
-class PerformanceListSerializer(serializers.ModelSerializer):
+class PerformanceListSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer
+):
     play = serializers.SlugRelatedField(
         slug_field="title",
         read_only=True,
@@ -103,6 +224,13 @@ class PerformanceListSerializer(serializers.ModelSerializer):
     play_image = serializers.ImageField(source="play.image", read_only=True)
     tickets_available = serializers.IntegerField(read_only=True)
 
+    field_dependencies = {
+        "tickets_available": ("tickets_sold", "theatre_hall"),
+    }
+    values_expressions = {
+        "tickets_available": F("theatre_hall__capacity") - F("tickets_sold"),
+    }
+
     class Meta:
         model = Performance
         fields = (
@@ -111,29 +239,76 @@ class PerformanceListSerializer(serializers.ModelSerializer):
         )
 
 
-class PerformanceDetailSerializer(serializers.ModelSerializer):
+class PerformanceDetailSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer
+):
     play = PlayListSerializer(read_only=True, many=False)
     theatre_hall = TheatreHallSerializer(read_only=True, many=False)
 
+    expandable_fields = ("play", "theatre_hall")
+
     class Meta:
         model = Performance
         fields = ("id", "play", "theatre_hall", "show_time")
 
 
+class TicketBatchSerializer(serializers.ListSerializer):
+    """
+    Validates all tickets of a reservation at once: performances and their
+    halls are loaded with a single query and every invalid seat is reported
+    in one error instead of failing on the first one
+    """
+
+    def validate(self, attrs):
+        performances = (
+            Performance.objects
+            .select_related("theatre_hall")
+            .in_bulk({ticket["performance_id"] for ticket in attrs})
+        )
+        errors = []
+        for ticket in attrs:
+            performance = performances.get(ticket["performance_id"])
+            if performance is None:
+                errors.append(
+                    f"performance {ticket['performance_id']} does not exist"
+                )
+                continue
+            try:
+                Ticket.validate_tickets(
+                    row=ticket["row"],
+                    seat=ticket["seat"],
+                    theatre_hall=performance.theatre_hall,
+                    error_to_raise=ValidationError
+                )
+            except ValidationError as error:
+                errors.extend(error.detail)
+
+        seats = Counter(
+            (ticket["performance_id"], ticket["row"], ticket["seat"])
+            for ticket in attrs
+        )
+        errors.extend(
+            f"seat {seat} in row {row} for performance "
+            f"{performance_id} is requested more than once"
+            for performance_id, row, seat in sorted(seats)
+            if seats[(performance_id, row, seat)] > 1
+        )
+        if errors:
+            raise ValidationError(errors)
+
+        for ticket in attrs:
+            performance_id = ticket.pop("performance_id")
+            ticket["performance"] = performances[performance_id]
+        return attrs
+
+
 class TicketSerializer(serializers.ModelSerializer):
+    performance = serializers.IntegerField(source="performance_id")
+
     class Meta:
         model = Ticket
         fields = ("row", "seat", "performance")
-
-    def validate(self, attrs):
-        data = super(TicketSerializer, self).validate(attrs=attrs)
-        Ticket.validate_tickets(
-            row=attrs["row"],
-            seat=attrs["seat"],
-            theatre_hall=attrs["performance"].theatre_hall,
-            error_to_raise=ValidationError
-        )
-        return data
+        list_serializer_class = TicketBatchSerializer
 
 
 class TicketListSerializer(serializers.ModelSerializer):
@@ -164,11 +339,7 @@ class ReservationSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         tickets_data = validated_data.pop("tickets")
-        with transaction.atomic():
-            reservation = Reservation.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(reservation=reservation, **ticket_data)
-            return reservation
+        return reserve_tickets(tickets_data, **validated_data)
 
 
 class ReservationListSerializer(serializers.ModelSerializer):
@@ -185,3 +356,27 @@ class ReservationDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Reservation
         fields = ("id", "tickets")
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SeatHold
+        fields = ("id", "row", "seat", "performance", "expires_at")
+
+
+class SeatHoldCreateSerializer(serializers.Serializer):
+    tickets = TicketSerializer(many=True, allow_empty=False)
+    minutes = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.SEAT_HOLD_MAX_MINUTES,
+        default=settings.SEAT_HOLD_DEFAULT_MINUTES,
+    )
+
+    def create(self, validated_data):
+        return hold_seats(
+            validated_data["tickets"],
+            user=validated_data["user"],
+            expires_at=(
+                timezone.now() + timedelta(minutes=validated_data["minutes"])
+            ),
+        )
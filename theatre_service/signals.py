@@ -0,0 +1,101 @@
+from collections import Counter
+from contextvars import ContextVar
+
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from theatre_service.caching import bump_model_version
+from theatre_service.models import (
+    Actor,
+    Genre,
+    Performance,
+    Play,
+    Reservation,
+    TheatreHall,
+    Ticket,
+)
+from theatre_service.seat_map import invalidate_seat_maps
+
+
+# ids of the reservations being deleted, whose tickets were released
+# together in count_released_reservation
+_released_reservations = ContextVar(
+    "released_reservations", default=frozenset()
+)
+
+
+@receiver(post_save, sender=Ticket)
+def count_sold_ticket(sender, instance, created, **kwargs):
+    """
+    Keeps Performance.tickets_sold in step with tickets saved one by one
+    (admin, shell), including a ticket moved to another performance. Bulk
+    inserts skip signals and update the counter themselves
+    """
+    previous = getattr(instance, "_loaded_performance_id", None)
+    if created:
+        Performance.change_tickets_sold({instance.performance_id: 1})
+    elif previous is not None and previous != instance.performance_id:
+        Performance.change_tickets_sold(
+            {previous: -1, instance.performance_id: 1}
+        )
+        invalidate_seat_maps([previous])
+    instance._loaded_performance_id = instance.performance_id
+    invalidate_seat_maps([instance.performance_id])
+
+
+@receiver(pre_delete, sender=Reservation)
+def count_released_reservation(sender, instance, **kwargs):
+    """
+    Releases the tickets of a deleted reservation with one counter update
+    per performance, instead of one per ticket in count_released_ticket
+    """
+    released = Counter(
+        instance.tickets.order_by().values_list("performance_id", flat=True)
+    )
+    Performance.change_tickets_sold(
+        {performance_id: -count for performance_id, count in released.items()}
+    )
+    invalidate_seat_maps(released)
+    bump_model_version(Ticket)
+    _released_reservations.set(_released_reservations.get() | {instance.pk})
+
+
+@receiver(post_delete, sender=Reservation)
+def forget_released_reservation(sender, instance, **kwargs):
+    _released_reservations.set(_released_reservations.get() - {instance.pk})
+
+
+@receiver(post_delete, sender=Ticket)
+def count_released_ticket(sender, instance, **kwargs):
+    if instance.reservation_id in _released_reservations.get():
+        return
+    Performance.change_tickets_sold({instance.performance_id: -1})
+    invalidate_seat_maps([instance.performance_id])
+    bump_model_version(Ticket)
+
+
+VERSIONED_MODELS = (
+    Actor, Genre, Play, TheatreHall, Performance, Reservation, Ticket
+)
+
+
+def bump_version(sender, **kwargs):
+    bump_model_version(sender)
+
+
+def bump_play_version(sender, **kwargs):
+    bump_model_version(Play)
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_version, sender=model)
+    # deleted tickets are versioned with their counters above
+    if model is not Ticket:
+        post_delete.connect(bump_version, sender=model)
+m2m_changed.connect(bump_play_version, sender=Play.actors.through)
+m2m_changed.connect(bump_play_version, sender=Play.genres.through)
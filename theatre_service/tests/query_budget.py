@@ -0,0 +1,84 @@
+from contextlib import ContextDecorator
+
+from django.core.signals import request_finished, request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudget(ContextDecorator):
+    """See ``query_budget``"""
+
+    def __init__(self, max_queries, using=DEFAULT_DB_ALIAS):
+        self.max_queries = max_queries
+        self.using = using
+
+    def __enter__(self):
+        # [label, index of the first query, index after the last one]
+        self.requests = []
+        self.captured = CaptureQueriesContext(connections[self.using])
+        self.captured.__enter__()
+        request_started.connect(self._request_started)
+        request_finished.connect(self._request_finished)
+        return self
+
+    def _request_started(self, sender, environ=None, scope=None, **kwargs):
+        if environ is not None:
+            method, path = environ["REQUEST_METHOD"], environ["PATH_INFO"]
+            query_string = environ.get("QUERY_STRING", "")
+        else:
+            method, path = scope["method"], scope["path"]
+            query_string = scope.get("query_string", b"").decode()
+        if query_string:
+            path = f"{path}?{query_string}"
+        self.requests.append([f"{method} {path}", len(self.captured), None])
+
+    def _request_finished(self, sender, **kwargs):
+        if self.requests and self.requests[-1][2] is None:
+            self.requests[-1][2] = len(self.captured)
+
+    def query_counts(self):
+        """Requests made so far with the number of queries of each"""
+        return [
+            (label, len(self._queries(start, end)))
+            for label, start, end in self.requests
+        ]
+
+    def _queries(self, start, end):
+        return self.captured.captured_queries[start:end]
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        request_started.disconnect(self._request_started)
+        request_finished.disconnect(self._request_finished)
+        self.captured.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return False
+
+        over_budget = []
+        for label, start, end in self.requests:
+            queries = self._queries(start, end)
+            if len(queries) > self.max_queries:
+                over_budget.append(
+                    f"{label} issued {len(queries)} queries:\n"
+                    + "\n".join(
+                        f"{number}. {query['sql']}"
+                        for number, query in enumerate(queries, start=1)
+                    )
+                )
+        if over_budget:
+            raise AssertionError(
+                f"Over the budget of {self.max_queries} queries per "
+                "request:\n\n" + "\n\n".join(over_budget)
+            )
+
+
+def query_budget(max_queries, using=DEFAULT_DB_ALIAS):
+    """
+    Fails when a request made through the test client inside the block
+    (or the decorated test) issues more than ``max_queries`` queries.
+    Queries made outside requests, like fixtures, are not counted. The
+    error lists the SQL of every request over its budget::
+
+        with query_budget(3):
+            self.client.get(PERFORMANCE_URL)
+    """
+    return QueryBudget(max_queries, using)
@@ -59,6 +59,22 @@ class PrivateActorApiTests(TestCase):
         response = self.client.post(ACTOR_URL, payload)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_search_actors_by_either_name(self):
+        sample_actor(first_name="Kenneth", last_name="Branagh")
+        sample_actor(first_name="Judi", last_name="Dench")
+
+        response = self.client.get(ACTOR_URL, data={"search": "bran"})
+        self.assertEqual(
+            [actor["full_name"] for actor in response.data["results"]],
+            ["Kenneth Branagh"],
+        )
+
+        response = self.client.get(ACTOR_URL, data={"search": "judi"})
+        self.assertEqual(
+            [actor["full_name"] for actor in response.data["results"]],
+            ["Judi Dench"],
+        )
+
 
 class AdminActorApiTests(TestCase):
     def setUp(self):
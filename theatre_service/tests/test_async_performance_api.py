@@ -0,0 +1,147 @@
+import datetime
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from theatre_service.models import Performance, Reservation, Ticket
+from theatre_service.tests.test_performance_api import sample_performance
+
+ASYNC_PERFORMANCE_URL = reverse("theatre-api:async-performance-list")
+PERFORMANCE_URL = reverse("theatre-api:performance-list")
+
+
+class AsyncPerformanceApiTests(TestCase):
+    """The async endpoints answer exactly like their sync counterparts"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="test_user",
+            email="user@test.com",
+            password="testpass",
+        )
+        self.auth = {
+            "HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.user)}"
+        }
+        self.performance = sample_performance()
+        for day in (3, 4):
+            Performance.objects.create(
+                play=self.performance.play,
+                theatre_hall=self.performance.theatre_hall,
+                show_time=datetime.datetime(
+                    2022, 9, day, 19, tzinfo=datetime.timezone.utc
+                ),
+            )
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            performance=self.performance,
+            reservation=Reservation.objects.create(user=self.user),
+        )
+
+    def get(self, url, data=None):
+        response = self.client.get(url, data, **self.auth)
+        return response.status_code, json.loads(response.content)
+
+    def test_auth_required(self):
+        response = self.client.get(ASYNC_PERFORMANCE_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("Bearer", response["WWW-Authenticate"])
+
+    def test_invalid_token(self):
+        response = self.client.get(
+            ASYNC_PERFORMANCE_URL, HTTP_AUTHORIZATION="Bearer invalid"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_read_only(self):
+        response = self.client.post(ASYNC_PERFORMANCE_URL, {}, **self.auth)
+
+        self.assertEqual(
+            response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED
+        )
+
+    def test_list(self):
+        params = {"page_size": 2, "page": 2, "date_from": "2022-09-01"}
+
+        status_code, data = self.get(ASYNC_PERFORMANCE_URL, params)
+        _, expected = self.get(PERFORMANCE_URL, params)
+
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        self.assertEqual(data["count"], 3)
+        self.assertEqual(data["results"], expected["results"])
+        self.assertEqual(
+            data["previous"],
+            expected["previous"].replace(
+                PERFORMANCE_URL, ASYNC_PERFORMANCE_URL
+            ),
+        )
+        self.assertIsNone(data["next"])
+
+    def test_list_invalid_page(self):
+        status_code, data = self.get(ASYNC_PERFORMANCE_URL, {"page": 5})
+
+        self.assertEqual(status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(data, {"detail": "Invalid page."})
+
+    def test_list_invalid_date(self):
+        status_code, data = self.get(
+            ASYNC_PERFORMANCE_URL, {"date": "yesterday"}
+        )
+
+        self.assertEqual(status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("date", data)
+
+    def test_detail(self):
+        status_code, data = self.get(
+            reverse(
+                "theatre-api:async-performance-detail",
+                args=[self.performance.id],
+            )
+        )
+
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            data,
+            self.get(
+                reverse(
+                    "theatre-api:performance-detail",
+                    args=[self.performance.id],
+                )
+            )[1],
+        )
+
+    def test_detail_not_found(self):
+        status_code, _ = self.get(
+            reverse("theatre-api:async-performance-detail", args=[999])
+        )
+
+        self.assertEqual(status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_seats(self):
+        status_code, data = self.get(
+            reverse(
+                "theatre-api:async-performance-seats",
+                args=[self.performance.id],
+            )
+        )
+
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        self.assertEqual(data["tickets_available"], 299)
+        self.assertEqual(
+            data,
+            self.get(
+                reverse(
+                    "theatre-api:performance-seats",
+                    args=[self.performance.id],
+                )
+            )[1],
+        )
@@ -0,0 +1,182 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from theatre.authentication import (
+    TOKEN_VERSION_CLAIM,
+    VersionedAccessToken,
+    token_version,
+    user_cache,
+)
+from theatre_service.models import Genre
+
+GENRE_URL = reverse("theatre-api:genre-list")
+ASYNC_PERFORMANCE_URL = reverse("theatre-api:async-performance-list")
+TOKEN_URL = reverse("token_obtain_pair")
+TOKEN_REFRESH_URL = reverse("token_refresh")
+ME_URL = reverse("manage")
+
+
+def user_queries(captured):
+    return [
+        query["sql"]
+        for query in captured.captured_queries
+        if '"auth_user"' in query["sql"]
+    ]
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="test_user",
+            email="user@test.com",
+            password="testpass",
+        )
+        self.client = APIClient()
+        Genre.objects.create(name="Drama")
+
+    def tearDown(self):
+        user_cache.clear()
+
+    def obtain_tokens(self):
+        response = self.client.post(
+            TOKEN_URL, {"username": "test_user", "password": "testpass"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def get(self, url, token):
+        return self.client.get(url, HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_issued_tokens_carry_version(self):
+        access = AccessToken(self.obtain_tokens()["access"])
+
+        self.assertNotIn("is_staff", access.payload)
+        self.assertEqual(access[TOKEN_VERSION_CLAIM], token_version(self.user))
+
+    def test_cached_user_is_not_loaded_again(self):
+        token = self.obtain_tokens()["access"]
+        self.get(GENRE_URL, token)
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.get(GENRE_URL, token)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(user_queries(captured), [])
+
+    def test_async_endpoint_uses_the_cache(self):
+        token = VersionedAccessToken.for_user(self.user)
+        self.get(GENRE_URL, token)
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.get(ASYNC_PERFORMANCE_URL, token)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(user_queries(captured), [])
+
+    def test_password_change_revokes_tokens(self):
+        tokens = self.obtain_tokens()
+        self.get(GENRE_URL, tokens["access"])
+
+        self.user.set_password("newpass")
+        self.user.save()
+
+        response = self.get(GENRE_URL, tokens["access"])
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data["code"], "token_revoked")
+        response = self.client.post(
+            TOKEN_REFRESH_URL, {"refresh": tokens["refresh"]}
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_revokes_tokens_on_me(self):
+        token = self.obtain_tokens()["access"]
+        self.assertEqual(
+            self.get(ME_URL, token).status_code, status.HTTP_200_OK
+        )
+
+        self.user.set_password("newpass")
+        self.user.save()
+
+        self.assertEqual(
+            self.get(ME_URL, token).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        response = self.client.patch(
+            ME_URL,
+            {"email": "other@test.com"},
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivation_revokes_tokens(self):
+        token = self.obtain_tokens()["access"]
+        self.get(GENRE_URL, token)
+
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.get(GENRE_URL, token)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_staff_change_revokes_tokens(self):
+        self.user.is_staff = True
+        self.user.save()
+        token = VersionedAccessToken.for_user(self.user)
+        self.get(GENRE_URL, token)
+
+        self.user.is_staff = False
+        self.user.save()
+
+        response = self.get(GENRE_URL, token)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_new_token_is_served_after_revocation(self):
+        old_token = self.obtain_tokens()["access"]
+        self.get(GENRE_URL, old_token)
+        self.user.set_password("newpass")
+        self.user.save()
+
+        new_token = VersionedAccessToken.for_user(self.user)
+
+        self.assertEqual(
+            self.get(GENRE_URL, new_token).status_code, status.HTTP_200_OK
+        )
+        self.assertEqual(
+            self.get(GENRE_URL, old_token).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+    @override_settings(AUTH_USER_CACHE_TTL=60)
+    def test_changes_made_elsewhere_apply_after_the_ttl(self):
+        token = VersionedAccessToken.for_user(self.user)
+        self.get(GENRE_URL, token)
+        # as another process would: the local cache is not told
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_active=False
+        )
+
+        response = self.get(GENRE_URL, token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with mock.patch(
+            "theatre.authentication.time.monotonic",
+            return_value=10 ** 9,
+        ):
+            response = self.get(GENRE_URL, token)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_tokens_without_version_are_still_accepted(self):
+        token = AccessToken.for_user(self.user)
+
+        self.assertEqual(
+            self.get(GENRE_URL, token).status_code, status.HTTP_200_OK
+        )
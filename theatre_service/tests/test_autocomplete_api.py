@@ -0,0 +1,102 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import ProgrammingError
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre_service.autocomplete import PrefixIndex
+from theatre_service.models import Actor, Genre, Play
+
+AUTOCOMPLETE_URL = reverse("theatre-api:autocomplete")
+
+
+def labels(response):
+    return [
+        (result["type"], result["label"])
+        for result in response.data["results"]
+    ]
+
+
+class PublicAutocompleteApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(AUTOCOMPLETE_URL, data={"q": "ham"})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateAutocompleteApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="test_user",
+            email="user@test.com",
+            password="testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        Play.objects.create(title="Hamlet", description="", duration=180)
+        Actor.objects.create(first_name="Anna", last_name="Hamilton")
+        Genre.objects.create(name="Drama")
+
+    def test_prefix_matches_all_types(self):
+        response = self.client.get(AUTOCOMPLETE_URL, data={"q": "HAM"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            labels(response),
+            [("actor", "Anna Hamilton"), ("play", "Hamlet")],
+        )
+
+    def test_every_word_must_match(self):
+        response = self.client.get(AUTOCOMPLETE_URL, data={"q": "ham an"})
+
+        self.assertEqual(labels(response), [("actor", "Anna Hamilton")])
+
+    def test_empty_query(self):
+        response = self.client.get(AUTOCOMPLETE_URL)
+
+        self.assertEqual(response.data["results"], [])
+
+    def test_limit(self):
+        response = self.client.get(
+            AUTOCOMPLETE_URL, data={"q": "ham", "limit": 1}
+        )
+
+        self.assertEqual(labels(response), [("actor", "Anna Hamilton")])
+
+    def test_limit_must_be_positive(self):
+        for limit in ("0", "-1", "many"):
+            response = self.client.get(
+                AUTOCOMPLETE_URL, data={"q": "ham", "limit": limit}
+            )
+
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
+
+    def test_warm_survives_a_missing_table(self):
+        index = PrefixIndex()
+
+        with mock.patch.object(
+            Play.objects, "values_list", side_effect=ProgrammingError
+        ), self.assertLogs("theatre_service.autocomplete", "ERROR"):
+            index.warm()
+
+        self.assertEqual(index.search("hamle")[0]["label"], "Hamlet")
+
+    def test_index_follows_catalog_changes(self):
+        self.client.get(AUTOCOMPLETE_URL, data={"q": "dra"})
+        Genre.objects.create(name="Dramedy")
+
+        response = self.client.get(AUTOCOMPLETE_URL, data={"q": "dra"})
+
+        self.assertEqual(
+            labels(response), [("genre", "Drama"), ("genre", "Dramedy")]
+        )
@@ -0,0 +1,97 @@
+import json
+import os
+import random
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from theatre_service.benchmarks import (
+    BENCH_CACHES,
+    clear,
+    dataset_size,
+    run_cases,
+    seed,
+)
+from theatre_service.models import Performance, Ticket
+
+SMALL_VOLUMES = {
+    "actors": 12,
+    "genres": 4,
+    "plays": 6,
+    "theatre_halls": 2,
+    "performances": 10,
+    "users": 3,
+    "reservations": 20,
+    "tickets_per_reservation": 2,
+}
+
+
+class BenchmarkHarnessTests(TestCase):
+    def test_seed_inserts_the_requested_volumes(self):
+        inserted = seed(SMALL_VOLUMES, batch_size=5, rng=random.Random(1))
+
+        self.assertEqual(inserted["theatre_service.Actor"], 12)
+        self.assertEqual(inserted["theatre_service.Performance"], 10)
+        self.assertEqual(inserted["theatre_service.Reservation"], 20)
+        self.assertEqual(inserted["theatre_service.Ticket"], 40)
+        # the admin is inserted on top of the regular users
+        self.assertEqual(inserted["auth.User"], 4)
+        self.assertEqual(
+            sum(Performance.objects.values_list("tickets_sold", flat=True)),
+            Ticket.objects.count(),
+        )
+
+    def test_clear_removes_the_seeded_rows(self):
+        seed(SMALL_VOLUMES)
+
+        clear()
+
+        self.assertEqual(set(dataset_size().values()), {0})
+
+    def test_every_case_is_timed(self):
+        seed(SMALL_VOLUMES)
+
+        with override_settings(
+            ALLOWED_HOSTS=["testserver"], CACHES=BENCH_CACHES
+        ):
+            results = run_cases(repeat=2)
+
+        names = {result["name"] for result in results}
+        for basename in (
+            "actor", "genre", "play", "theatrehall", "performance",
+            "reservation",
+        ):
+            for action in ("list", "retrieve", "create"):
+                self.assertIn(f"{basename}-{action}", names)
+        for result in results:
+            self.assertGreater(result["queries"], 0, result["name"])
+            self.assertLessEqual(result["p50_ms"], result["p95_ms"])
+            self.assertGreater(result["peak_memory_kib"], 0)
+
+    def test_run_bench_writes_a_json_report(self):
+        call_command("seed_bench", stdout=StringIO(), **{
+            name: volume for name, volume in SMALL_VOLUMES.items()
+        })
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "report.json")
+
+            call_command(
+                "run_bench",
+                repeat=2,
+                cases=["performance-list"],
+                output=path,
+                stdout=StringIO(),
+            )
+
+            with open(path) as report_file:
+                report = json.load(report_file)
+
+        self.assertEqual(report["dataset"]["theatre_service.Performance"], 10)
+        self.assertEqual(
+            [result["name"] for result in report["results"]],
+            ["performance-list"],
+        )
+        # the created rows are rolled back
+        self.assertEqual(Performance.objects.count(), 10)
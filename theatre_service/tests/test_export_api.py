@@ -0,0 +1,120 @@
+import csv
+import datetime
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre_service.models import Performance, Reservation, Ticket
+from theatre_service.tests.test_performance_api import sample_performance
+
+TICKET_EXPORT_URL = reverse("theatre-api:export-tickets")
+RESERVATION_EXPORT_URL = reverse("theatre-api:export-reservations")
+
+
+def content(response):
+    return b"".join(response.streaming_content).decode()
+
+
+class ExportApiTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="test_user",
+            email="user@test.com",
+            password="testpass",
+        )
+        self.admin = get_user_model().objects.create_user(
+            username="test_admin",
+            email="admin@test.com",
+            password="testpass",
+            is_staff=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+        september = sample_performance(
+            show_time=datetime.datetime(
+                2022, 9, 2, 19, tzinfo=datetime.timezone.utc
+            )
+        )
+        october = Performance.objects.create(
+            play=september.play,
+            theatre_hall=september.theatre_hall,
+            show_time=datetime.datetime(
+                2022, 10, 2, 19, tzinfo=datetime.timezone.utc
+            ),
+        )
+        self.reservation = Reservation.objects.create(user=self.user)
+        for performance, seat in (
+            (september, 1), (september, 2), (october, 1)
+        ):
+            Ticket.objects.create(
+                row=1,
+                seat=seat,
+                performance=performance,
+                reservation=self.reservation,
+            )
+
+    def test_staff_only(self):
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get(TICKET_EXPORT_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_tickets_csv(self):
+        response = self.client.get(TICKET_EXPORT_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn(
+            'filename="tickets.csv"', response["Content-Disposition"]
+        )
+        rows = list(csv.DictReader(io.StringIO(content(response))))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["email"], "user@test.com")
+        self.assertEqual(rows[0]["show_time"], "2022-09-02T19:00:00Z")
+        self.assertEqual(
+            [(row["row"], row["seat"]) for row in rows],
+            [("1", "1"), ("1", "2"), ("1", "1")],
+        )
+
+    def test_export_tickets_ndjson_date_range(self):
+        response = self.client.get(
+            TICKET_EXPORT_URL,
+            {
+                "export_format": "ndjson",
+                "date_from": "2022-10-01",
+                "date_to": "2022-10-31",
+            },
+        )
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in content(response).splitlines()]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]["show_time"], "2022-10-02T19:00:00Z")
+
+    def test_export_reservations(self):
+        response = self.client.get(
+            RESERVATION_EXPORT_URL,
+            {"export_format": "ndjson", "date_to": "2022-09-30"},
+        )
+
+        lines = [json.loads(line) for line in content(response).splitlines()]
+        self.assertEqual(
+            [(line["id"], line["tickets"]) for line in lines],
+            [(self.reservation.id, 2)],
+        )
+
+    def test_invalid_export_format(self):
+        response = self.client.get(
+            TICKET_EXPORT_URL, {"export_format": "xlsx"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -57,6 +57,17 @@ class PrivateGenreApiTests(TestCase):
         response = self.client.post(GENRE_URL, payload)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_search_genres(self):
+        sample_genre(name="Tragedy")
+        sample_genre(name="Comedy")
+
+        response = self.client.get(GENRE_URL, data={"search": "trag"})
+
+        self.assertEqual(
+            [genre["name"] for genre in response.data["results"]],
+            ["Tragedy"],
+        )
+
 
 class AdminGenreApiTests(TestCase):
     def setUp(self):
@@ -0,0 +1,92 @@
+import datetime
+import io
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+
+from rest_framework import status
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from theatre.parsers import FastJSONParser
+from theatre.renderers import FastJSONRenderer
+
+SAMPLE_DATA = {
+    "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "show_time": datetime.datetime(
+        2022, 9, 2, 19, 30, 0, 123456, tzinfo=datetime.timezone.utc
+    ),
+    "date": datetime.date(2022, 9, 2),
+    "price": Decimal("12.50"),
+    "label": gettext_lazy("Hamlet"),
+    "error": ErrorDetail("invalid", code="invalid"),
+    "text": "Привіт \u2028 line",
+    "counts": {1: 2},
+    "tags": ("a", "b"),
+}
+
+
+class FastJSONRendererTests(TestCase):
+    def test_matches_stock_renderer(self):
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE_DATA),
+            JSONRenderer().render(SAMPLE_DATA),
+        )
+
+    @override_settings(JSON_BACKEND="json")
+    def test_stdlib_backend(self):
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE_DATA),
+            JSONRenderer().render(SAMPLE_DATA),
+        )
+
+    def test_indented_output(self):
+        self.assertEqual(
+            FastJSONRenderer().render(
+                {"a": 1}, "application/json; indent=2"
+            ),
+            b'{\n  "a": 1\n}',
+        )
+
+    def test_parser_round_trip(self):
+        body = FastJSONRenderer().render({"tickets": [{"row": 1}]})
+
+        self.assertEqual(
+            FastJSONParser().parse(io.BytesIO(body)),
+            {"tickets": [{"row": 1}]},
+        )
+
+    def test_bench_command(self):
+        out = io.StringIO()
+
+        call_command("bench_json", rows=5, repeat=1, stdout=out)
+
+        self.assertIn("performance page, 5 rows", out.getvalue())
+        self.assertIn("play page, 5 rows", out.getvalue())
+
+
+class JSONApiTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="test_user",
+            email="user@test.com",
+            password="testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_malformed_body(self):
+        response = self.client.post(
+            reverse("theatre-api:reservation-list"),
+            data=b'{"tickets": [',
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("JSON parse error", response.data["detail"])
@@ -0,0 +1,116 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from theatre_service.fast_path import ValuesPlan
+from theatre_service.models import (
+    Actor,
+    Genre,
+    Performance,
+    Play,
+    Reservation,
+    TheatreHall,
+    Ticket,
+)
+from theatre_service.views import (
+    PerformanceViewSet,
+    PlayViewSet,
+    ReservationViewSet,
+)
+
+
+class ListFastPathTests(TestCase):
+    """The values fast path renders exactly what the serializers render"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="test_user",
+            email="user@test.com",
+            password="testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        drama = Genre.objects.create(name="Drama")
+        comedy = Genre.objects.create(name="Comedy")
+        actors = [
+            Actor.objects.create(first_name=first_name, last_name=last_name)
+            for first_name, last_name in (
+                ("Anna", "Zeta"), ("Boris", "Alpha"), ("Clara", "Moon")
+            )
+        ]
+        hall = TheatreHall.objects.create(name="Blue", rows=5, seats_in_row=8)
+        for index in range(3):
+            play = Play.objects.create(
+                title=f"Play {index}",
+                description=f"Description {index}",
+                duration=None if index else 90,
+                image=f"uploads/plays/play-{index}.jpg" if index else None,
+            )
+            play.actors.add(*actors[index:])
+            play.genres.add(comedy, drama)
+            for day in (1, 2):
+                performance = Performance.objects.create(
+                    play=play,
+                    theatre_hall=hall,
+                    show_time=datetime.datetime(
+                        2022, 9, day, 19, index, 30, 250000,
+                        tzinfo=datetime.timezone.utc,
+                    ),
+                )
+                reservation = Reservation.objects.create(user=self.user)
+                for seat in range(1, index + 2):
+                    Ticket.objects.create(
+                        row=day,
+                        seat=seat,
+                        performance=performance,
+                        reservation=reservation,
+                    )
+
+    def assert_same_output(self, viewset, url, data=None):
+        with mock.patch.object(
+            ValuesPlan, "build", autospec=True, side_effect=ValuesPlan.build
+        ) as build:
+            fast = self.client.get(url, data)
+        build.assert_called()
+
+        cache.clear()
+        with mock.patch.object(viewset, "values_fast_path", False):
+            regular = self.client.get(url, data)
+
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.content, regular.content)
+
+    def test_play_list(self):
+        self.assert_same_output(PlayViewSet, reverse("theatre-api:play-list"))
+
+    def test_play_list_sparse_fields(self):
+        self.assert_same_output(
+            PlayViewSet,
+            reverse("theatre-api:play-list"),
+            {"fields": "id,actors,image"},
+        )
+
+    def test_performance_list(self):
+        self.assert_same_output(
+            PerformanceViewSet, reverse("theatre-api:performance-list")
+        )
+
+    def test_performance_list_cursor_pagination(self):
+        self.assert_same_output(
+            PerformanceViewSet,
+            reverse("theatre-api:performance-list"),
+            {"pagination": "cursor", "page_size": 4},
+        )
+
+    def test_reservation_list(self):
+        self.assert_same_output(
+            ReservationViewSet, reverse("theatre-api:reservation-list")
+        )
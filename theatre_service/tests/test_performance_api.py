@@ -1,18 +1,35 @@
 import datetime
+import time
+from io import StringIO
+from unittest import mock
+
+import base64
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
 from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from theatre_service.models import Performance, Play, TheatreHall
+from theatre_service.models import (
+    Performance,
+    Play,
+    Reservation,
+    TheatreHall,
+    Ticket,
+)
 from theatre_service.tests.test_actor_api import sample_actor
 from theatre_service.tests.test_theatre_hall_api import sample_theatre_hall
 from theatre_service.tests.test_genre_api import sample_genre
 from theatre_service.tests.test_play_api import sample_play
-from theatre_service.serializers import PerformanceDetailSerializer
+from theatre_service.serializers import (
+    PerformanceDetailSerializer,
+    PlayListSerializer,
+)
 
 PERFORMANCE_URL = reverse("theatre-api:performance-list")
 
@@ -53,6 +70,20 @@ def detail_url(performance_id):
     return reverse("theatre-api:performance-detail", args=[performance_id])
 
 
+def seats_url(performance_id):
+    return reverse("theatre-api:performance-seats", args=[performance_id])
+
+
+def taken_seats(seat_map):
+    bitmap = base64.b64decode(seat_map["bitmap"])
+    return {
+        (index // seat_map["seats_in_row"] + 1,
+         index % seat_map["seats_in_row"] + 1)
+        for index in range(seat_map["rows"] * seat_map["seats_in_row"])
+        if bitmap[index // 8] & (0x80 >> (index % 8))
+    }
+
+
 class PublicPerformanceApiTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -64,6 +95,7 @@ class PublicPerformanceApiTests(TestCase):
 
 class PrivatePerformanceApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.user = create_user(
             username="test_user",
             email="test@test.com",
@@ -78,6 +110,285 @@ class PrivatePerformanceApiTests(TestCase):
         response = self.client.get(PERFORMANCE_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_get_performances_tickets_available(self):
+        performance = sample_performance()
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(
+            performance=performance, reservation=reservation, row=1, seat=1
+        )
+
+        response = self.client.get(PERFORMANCE_URL)
+
+        self.assertEqual(
+            response.data["results"][0]["tickets_available"],
+            performance.theatre_hall.capacity - 1
+        )
+
+    def test_rebuild_tickets_sold_command(self):
+        performance = sample_performance()
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.bulk_create(
+            Ticket(
+                performance=performance,
+                reservation=reservation,
+                row=1,
+                seat=seat,
+            )
+            for seat in range(1, 6)
+        )
+
+        call_command("rebuild_tickets_sold", stdout=StringIO())
+
+        performance.refresh_from_db()
+        self.assertEqual(performance.tickets_sold, 5)
+
+    def test_get_performance_seats(self):
+        performance = sample_performance()
+        reservation = Reservation.objects.create(user=self.user)
+        for row, seat in [(1, 1), (2, 5), (15, 20)]:
+            Ticket.objects.create(
+                performance=performance,
+                reservation=reservation,
+                row=row,
+                seat=seat,
+            )
+
+        response = self.client.get(seats_url(performance.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["rows"], 15)
+        self.assertEqual(response.data["seats_in_row"], 20)
+        self.assertEqual(response.data["tickets_available"], 297)
+        self.assertEqual(
+            taken_seats(response.data), {(1, 1), (2, 5), (15, 20)}
+        )
+
+    def test_get_performance_seats_after_hall_shrinks(self):
+        performance = sample_performance()
+        reservation = Reservation.objects.create(user=self.user)
+        for row, seat in [(1, 1), (2, 5), (15, 20)]:
+            Ticket.objects.create(
+                performance=performance,
+                reservation=reservation,
+                row=row,
+                seat=seat,
+            )
+        self.client.get(seats_url(performance.id))
+        hall = performance.theatre_hall
+        hall.rows = hall.seats_in_row = 10
+        hall.save()
+
+        response = self.client.get(seats_url(performance.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["tickets_available"], 98)
+        self.assertEqual(taken_seats(response.data), {(1, 1), (2, 5)})
+
+    def test_performance_seats_cache_is_invalidated(self):
+        performance = sample_performance()
+        self.client.get(seats_url(performance.id))
+
+        ticket = {"row": 3, "seat": 4, "performance": performance.id}
+        self.client.post(
+            reverse("theatre-api:reservation-list"),
+            {"tickets": [ticket]},
+            format="json",
+        )
+        response = self.client.get(seats_url(performance.id))
+        self.assertEqual(taken_seats(response.data), {(3, 4)})
+
+        Ticket.objects.get().delete()
+        response = self.client.get(seats_url(performance.id))
+        self.assertEqual(taken_seats(response.data), set())
+
+    def test_get_performances_conditional(self):
+        performance = sample_performance()
+        response = self.client.get(PERFORMANCE_URL)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                PERFORMANCE_URL, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+        ticket = {"row": 1, "seat": 1, "performance": performance.id}
+        self.client.post(
+            reverse("theatre-api:reservation-list"),
+            {"tickets": [ticket]},
+            format="json",
+        )
+        response = self.client.get(PERFORMANCE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_retrieve_performance_etag_follows_actor_names(self):
+        performance = sample_performance()
+        url = detail_url(performance.id)
+        etag = self.client.get(url)["ETag"]
+
+        actor = performance.play.actors.get()
+        actor.first_name = "Renamed"
+        actor.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertIn(
+            "Renamed test_last", response.data["play"]["actors"]
+        )
+
+    def test_upcoming_etag_changes_every_minute(self):
+        sample_performance()
+        params = {"upcoming": "true"}
+        now = timezone.now().replace(second=0, microsecond=0)
+        with mock.patch(
+            "theatre_service.filters.timezone.now", return_value=now
+        ):
+            etag = self.client.get(PERFORMANCE_URL, params)["ETag"]
+            response = self.client.get(
+                PERFORMANCE_URL, params, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with mock.patch(
+            "theatre_service.filters.timezone.now",
+            return_value=now + datetime.timedelta(minutes=1),
+        ):
+            response = self.client.get(
+                PERFORMANCE_URL, params, HTTP_IF_NONE_MATCH=etag
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_outlives_the_cache_timeout(self):
+        sample_performance()
+        etag = self.client.get(PERFORMANCE_URL)["ETag"]
+
+        with mock.patch(
+            "django.core.cache.backends.locmem.time.time",
+            return_value=time.time() + 24 * 60 * 60,
+        ):
+            response = self.client.get(
+                PERFORMANCE_URL, HTTP_IF_NONE_MATCH=etag
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_get_performances_cursor_pagination(self):
+        performance = sample_performance()
+        for day in (3, 4, 5):
+            Performance.objects.create(
+                play=performance.play,
+                theatre_hall=performance.theatre_hall,
+                show_time=datetime.datetime(
+                    2022, 9, day, tzinfo=datetime.timezone.utc
+                ),
+            )
+
+        response = self.client.get(
+            PERFORMANCE_URL, {"pagination": "cursor", "page_size": 3}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+        self.assertEqual(
+            [item["show_time"][:10] for item in response.data["results"]],
+            ["2022-09-05", "2022-09-04", "2022-09-03"],
+        )
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]],
+            [performance.id],
+        )
+        self.assertIsNone(response.data["next"])
+
+    def _performances_on_days(self, *days):
+        performance = sample_performance()
+        for day in days:
+            Performance.objects.create(
+                play=performance.play,
+                theatre_hall=performance.theatre_hall,
+                show_time=datetime.datetime(
+                    2022, 9, day, 23, 30, tzinfo=datetime.timezone.utc
+                ),
+            )
+
+    def _show_days(self, params):
+        response = self.client.get(PERFORMANCE_URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["show_time"][:10] for item in response.data["results"]]
+
+    def test_filter_performances_by_date(self):
+        self._performances_on_days(3, 4)
+
+        self.assertEqual(
+            self._show_days({"date": "2022-09-03"}), ["2022-09-03"]
+        )
+
+    def test_filter_performances_by_date_range(self):
+        self._performances_on_days(3, 4, 5, 6)
+
+        self.assertEqual(
+            self._show_days(
+                {"date_from": "2022-09-04", "date_to": "2022-09-05"}
+            ),
+            ["2022-09-05", "2022-09-04"],
+        )
+        self.assertEqual(
+            self._show_days({"date_from": "2022-09-05"}),
+            ["2022-09-06", "2022-09-05"],
+        )
+        self.assertEqual(
+            self._show_days({"date_to": "2022-09-03"}),
+            ["2022-09-03", "2022-09-02"],
+        )
+
+    def test_filter_upcoming_performances(self):
+        performance = sample_performance()
+        upcoming = Performance.objects.create(
+            play=performance.play,
+            theatre_hall=performance.theatre_hall,
+            show_time=timezone.now() + datetime.timedelta(days=1),
+        )
+
+        response = self.client.get(PERFORMANCE_URL, {"upcoming": "true"})
+
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]], [upcoming.id]
+        )
+
+    def test_filter_upcoming_excludes_shows_started_this_minute(self):
+        performance = sample_performance()
+        now = timezone.now().replace(second=30, microsecond=0)
+        Performance.objects.create(
+            play=performance.play,
+            theatre_hall=performance.theatre_hall,
+            show_time=now - datetime.timedelta(seconds=10),
+        )
+
+        with mock.patch(
+            "theatre_service.filters.timezone.now", return_value=now
+        ):
+            response = self.client.get(PERFORMANCE_URL, {"upcoming": "true"})
+
+        self.assertEqual(response.data["results"], [])
+
+    def test_filter_performances_invalid_play(self):
+        response = self.client.get(PERFORMANCE_URL, {"play": "x"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("play", response.data)
+
+    def test_filter_performances_invalid_date(self):
+        response = self.client.get(PERFORMANCE_URL, {"date_from": "09/04"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("date_from", response.data)
+
     def test_retrieve_performances(self):
         performance = sample_performance()
 
@@ -88,6 +399,58 @@ class PrivatePerformanceApiTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data, serializer.data)
 
+    def test_retrieve_performance_collapsed(self):
+        performance = sample_performance()
+
+        response = self.client.get(
+            detail_url(performance.id), {"expand": "theatre_hall"}
+        )
+
+        self.assertEqual(response.data["play"], performance.play_id)
+        self.assertEqual(response.data["theatre_hall"]["name"], "Blue")
+
+    def test_retrieve_performance_sparse_fields_keep_nested_whole(self):
+        performance = sample_performance()
+
+        response = self.client.get(
+            detail_url(performance.id), {"fields": "id,play"}
+        )
+
+        self.assertEqual(set(response.data), {"id", "play"})
+        self.assertEqual(
+            set(response.data["play"]), set(PlayListSerializer.Meta.fields)
+        )
+        self.assertEqual(response.data["play"]["title"], "Sample play")
+
+    def test_get_performances_sparse_fields_cursor_pagination(self):
+        performance = sample_performance()
+        for day in (3, 4):
+            Performance.objects.create(
+                play=performance.play,
+                theatre_hall=performance.theatre_hall,
+                show_time=datetime.datetime(
+                    2022, 9, day, tzinfo=datetime.timezone.utc
+                ),
+            )
+        params = {
+            "fields": "id,tickets_available",
+            "pagination": "cursor",
+            "page_size": 2,
+        }
+
+        with self.assertNumQueries(1):
+            response = self.client.get(PERFORMANCE_URL, params)
+
+        self.assertEqual(
+            response.data["results"][0],
+            {"id": performance.id + 2, "tickets_available": 300},
+        )
+        response = self.client.get(response.data["next"])
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]],
+            [performance.id],
+        )
+
     def test_post_performance(self):
         response = self.client.post(PERFORMANCE_URL, {})
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -3,7 +3,9 @@ import os
 
 from PIL import Image
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework.test import APIClient, APITestCase
@@ -251,3 +253,82 @@ class PlayTestAuthorizedUser(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data, serializer.data)
+
+    def test_list_play_is_cached_until_catalog_changes(self):
+        self.client.get(PLAY_URL)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(PLAY_URL)
+        self.assertEqual(len(response.data["results"]), 2)
+
+        self.actor.first_name = "Renamed"
+        self.actor.save()
+        response = self.client.get(PLAY_URL)
+        self.assertIn(
+            "Renamed Clooney", response.data["results"][0]["actors"]
+        )
+
+        self.client.get(detail_url(self.play.pk))
+        self.play.genres.remove(self.genre)
+        response = self.client.get(detail_url(self.play.pk))
+        self.assertEqual(response.data["genres"], [])
+
+    def test_cached_list_is_keyed_by_query_params(self):
+        self.client.get(PLAY_URL)
+
+        response = self.client.get(PLAY_URL, data={"title": "Test"})
+
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_list_play_sparse_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(PLAY_URL, data={"fields": "id,title"})
+
+        self.assertEqual(
+            [set(play) for play in response.data["results"]],
+            [{"id", "title"}] * 2,
+        )
+        for query in queries:
+            self.assertNotIn("description", query["sql"])
+            self.assertNotIn("play_actors", query["sql"])
+
+    def test_retrieve_play_expand(self):
+        response = self.client.get(
+            detail_url(self.play2.pk),
+            data={"fields": "title,actors,genres", "expand": "genres"},
+        )
+
+        self.assertEqual(
+            response.data,
+            {
+                "title": "Test play",
+                "actors": [self.actor.id, self.actor1.id],
+                "genres": [
+                    {"id": self.genre.id, "name": "Drama"},
+                    {"id": self.genre1.id, "name": "Comedy"},
+                ],
+            },
+        )
+
+    def test_search_plays_ranks_matches(self):
+        sample_play(
+            title="Hamlet",
+            description="Prince of Denmark and a play within a play",
+        )
+        sample_play(
+            title="Rosencrantz",
+            description="Two courtiers from Hamlet",
+        )
+
+        response = self.client.get(PLAY_URL, data={"search": "haml"})
+
+        self.assertEqual(
+            [play["title"] for play in response.data["results"]],
+            ["Hamlet", "Rosencrantz"],
+        )
+
+        response = self.client.get(PLAY_URL, data={"search": "prince den"})
+        self.assertEqual(
+            [play["title"] for play in response.data["results"]],
+            ["Hamlet"],
+        )
@@ -0,0 +1,365 @@
+"""
+Query budgets of every viewset action. The clients are force-authenticated,
+so the budgets leave out the user lookup of JWT authentication. List
+budgets hold at every page size, with both paginations and on both the
+values fast path and the serializer path.
+"""
+import datetime
+import tempfile
+from contextlib import ExitStack
+from unittest import mock
+
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre_service.models import (
+    Actor,
+    Genre,
+    Performance,
+    Play,
+    Reservation,
+    SeatHold,
+    TheatreHall,
+    Ticket,
+)
+from theatre_service.tests.query_budget import query_budget
+from theatre_service.views import (
+    PerformanceViewSet,
+    PlayViewSet,
+    ReservationViewSet,
+)
+
+PAGE_SIZES = (1, 10, 100)
+VALUES_LIST_VIEWSETS = (PlayViewSet, PerformanceViewSet, ReservationViewSet)
+
+
+def url(name, *args):
+    return reverse(f"theatre-api:{name}", args=args)
+
+
+def show_time(day, hour=19):
+    return datetime.datetime(2022, 9, day, hour, tzinfo=datetime.timezone.utc)
+
+
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="test_admin",
+            email="admin@test.com",
+            password="testpass",
+            is_staff=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.actors = [
+            Actor.objects.create(first_name=f"First{i}", last_name=f"Last{i}")
+            for i in range(6)
+        ]
+        self.genres = [
+            Genre.objects.create(name=f"Genre {i}") for i in range(4)
+        ]
+        self.plays = []
+        for i in range(3):
+            play = Play.objects.create(
+                title=f"Play {i}",
+                description="Description",
+                duration=90,
+                image=f"uploads/plays/play-{i}.jpg",
+            )
+            play.actors.add(*self.actors[2 * i:2 * i + 2])
+            play.genres.add(*self.genres[i:i + 2])
+            self.plays.append(play)
+        self.halls = [
+            TheatreHall.objects.create(
+                name=f"Hall {i}", rows=10, seats_in_row=10
+            )
+            for i in range(2)
+        ]
+        self.performances = [
+            Performance.objects.create(
+                play=self.plays[i % 3],
+                theatre_hall=self.halls[i % 2],
+                show_time=show_time(i + 1),
+            )
+            for i in range(12)
+        ]
+        self.reservations = []
+        for i in range(4):
+            reservation = Reservation.objects.create(user=self.user)
+            for seat in range(1, 4):
+                Ticket.objects.create(
+                    row=i + 1,
+                    seat=seat,
+                    performance=self.performances[i + seat],
+                    reservation=reservation,
+                )
+            self.reservations.append(reservation)
+
+    def assert_list_budget(self, list_url, max_queries, cursor=False):
+        paginations = ("page", "cursor") if cursor else ("page",)
+        for values_fast_path in (True, False):
+            with ExitStack() as stack:
+                for viewset in VALUES_LIST_VIEWSETS:
+                    stack.enter_context(
+                        mock.patch.object(
+                            viewset, "values_fast_path", values_fast_path
+                        )
+                    )
+                for page_size in PAGE_SIZES:
+                    for pagination in paginations:
+                        # a cached response would skip the queries
+                        cache.clear()
+                        with query_budget(max_queries):
+                            response = self.client.get(
+                                list_url,
+                                {
+                                    "page_size": page_size,
+                                    "pagination": pagination,
+                                },
+                            )
+                        self.assertEqual(
+                            response.status_code, status.HTTP_200_OK
+                        )
+
+    def assert_budget(self, max_queries, request, *args, **kwargs):
+        with query_budget(max_queries):
+            response = request(*args, **kwargs)
+        self.assertLess(response.status_code, 300, response.data)
+        return response
+
+    def test_budget_failure_lists_the_queries(self):
+        with self.assertRaisesMessage(
+            AssertionError, "GET /api/actors/ issued 2 queries:\n1. SELECT"
+        ):
+            with query_budget(1):
+                self.client.get(url("actor-list"))
+
+    def test_queries_outside_requests_are_not_counted(self):
+        with query_budget(1) as budget:
+            Actor.objects.count()
+            Genre.objects.count()
+            self.client.get(url("actor-detail", self.actors[0].pk))
+
+        self.assertEqual(budget.query_counts(), [("GET /api/actors/1/", 1)])
+
+    def test_actor_actions(self):
+        actor = self.actors[0]
+        self.assert_list_budget(url("actor-list"), 2)
+        self.assert_budget(1, self.client.get, url("actor-detail", actor.pk))
+        self.assert_budget(
+            2,
+            self.client.post,
+            url("actor-list"),
+            {"first_name": "New", "last_name": "Actor"},
+        )
+        self.assert_budget(
+            3,
+            self.client.put,
+            url("actor-detail", actor.pk),
+            {"first_name": "Changed", "last_name": "Actor"},
+        )
+        self.assert_budget(
+            3,
+            self.client.patch,
+            url("actor-detail", actor.pk),
+            {"first_name": "Patched"},
+        )
+        self.assert_budget(
+            3, self.client.delete, url("actor-detail", self.actors[5].pk)
+        )
+
+    def test_genre_actions(self):
+        genre = self.genres[0]
+        self.assert_list_budget(url("genre-list"), 2)
+        self.assert_budget(1, self.client.get, url("genre-detail", genre.pk))
+        self.assert_budget(
+            2, self.client.post, url("genre-list"), {"name": "New genre"}
+        )
+        self.assert_budget(
+            3,
+            self.client.put,
+            url("genre-detail", genre.pk),
+            {"name": "Changed genre"},
+        )
+        self.assert_budget(
+            3,
+            self.client.patch,
+            url("genre-detail", genre.pk),
+            {"name": "Patched genre"},
+        )
+        self.assert_budget(
+            3, self.client.delete, url("genre-detail", self.genres[3].pk)
+        )
+
+    def test_play_actions(self):
+        play = self.plays[0]
+        data = {
+            "title": "New play",
+            "description": "Description",
+            "duration": 100,
+            "actors": [actor.pk for actor in self.actors[:3]],
+            "genres": [genre.pk for genre in self.genres[:2]],
+        }
+        self.assert_list_budget(url("play-list"), 4)
+        self.assert_budget(3, self.client.get, url("play-detail", play.pk))
+        self.assert_budget(15, self.client.post, url("play-list"), data)
+        self.assert_budget(
+            16,
+            self.client.put,
+            url("play-detail", play.pk),
+            {**data, "title": "Changed play"},
+        )
+        self.assert_budget(
+            7,
+            self.client.patch,
+            url("play-detail", play.pk),
+            {"title": "Patched play"},
+        )
+        self.assert_budget(
+            15, self.client.delete, url("play-detail", self.plays[2].pk)
+        )
+
+    def test_play_upload_image(self):
+        play = self.plays[0]
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as image_file:
+            Image.new("RGB", (10, 10)).save(image_file, format="JPEG")
+            image_file.seek(0)
+            self.assert_budget(
+                4,
+                self.client.post,
+                url("play-upload-image", play.pk),
+                {"image": image_file},
+                format="multipart",
+            )
+        play.refresh_from_db()
+        play.image.delete()
+
+    def test_theatre_hall_actions(self):
+        hall = self.halls[0]
+        data = {"name": "New hall", "rows": 5, "seats_in_row": 6}
+        self.assert_list_budget(url("theatrehall-list"), 2)
+        self.assert_budget(
+            1, self.client.get, url("theatrehall-detail", hall.pk)
+        )
+        self.assert_budget(2, self.client.post, url("theatrehall-list"), data)
+        self.assert_budget(
+            3,
+            self.client.put,
+            url("theatrehall-detail", hall.pk),
+            {**data, "name": "Changed hall"},
+        )
+        self.assert_budget(
+            3,
+            self.client.patch,
+            url("theatrehall-detail", hall.pk),
+            {"rows": 12},
+        )
+        self.assert_budget(
+            13, self.client.delete, url("theatrehall-detail", self.halls[1].pk)
+        )
+
+    def test_performance_list(self):
+        self.assert_list_budget(url("performance-list"), 2, cursor=True)
+
+    @query_budget(3)
+    def test_performance_detail(self):
+        response = self.client.get(
+            url("performance-detail", self.performances[0].pk)
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @query_budget(3)
+    def test_performance_seats(self):
+        response = self.client.get(
+            url("performance-seats", self.performances[0].pk)
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_performance_writes(self):
+        performance = self.performances[0]
+        data = {
+            "play": self.plays[0].pk,
+            "theatre_hall": self.halls[0].pk,
+            "show_time": "2023-01-01T19:00:00Z",
+        }
+        self.assert_budget(4, self.client.post, url("performance-list"), data)
+        self.assert_budget(
+            5,
+            self.client.put,
+            url("performance-detail", performance.pk),
+            {**data, "show_time": "2023-01-02T19:00:00Z"},
+        )
+        self.assert_budget(
+            3,
+            self.client.patch,
+            url("performance-detail", performance.pk),
+            {"show_time": "2023-01-03T19:00:00Z"},
+        )
+        self.assert_budget(
+            4,
+            self.client.delete,
+            url("performance-detail", self.performances[11].pk),
+        )
+
+    def test_reservation_actions(self):
+        self.assert_list_budget(url("reservation-list"), 3, cursor=True)
+        self.assert_budget(
+            2,
+            self.client.get,
+            url("reservation-detail", self.reservations[0].pk),
+        )
+        self.assert_budget(
+            11,
+            self.client.post,
+            url("reservation-list"),
+            {
+                "tickets": [
+                    {
+                        "row": 9,
+                        "seat": seat,
+                        "performance": self.performances[0].pk,
+                    }
+                    for seat in range(1, 4)
+                ]
+            },
+            format="json",
+        )
+        self.assert_budget(
+            8,
+            self.client.delete,
+            url("reservation-detail", self.reservations[1].pk),
+        )
+
+    def test_seat_hold_actions(self):
+        self.assert_budget(
+            9,
+            self.client.post,
+            url("seathold-list"),
+            {
+                "tickets": [
+                    {
+                        "row": 8,
+                        "seat": seat,
+                        "performance": self.performances[0].pk,
+                    }
+                    for seat in range(1, 3)
+                ]
+            },
+            format="json",
+        )
+        self.assert_list_budget(url("seathold-list"), 2)
+        self.assert_budget(
+            4,
+            self.client.delete,
+            url("seathold-detail", SeatHold.objects.first().pk),
+        )
@@ -0,0 +1,145 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from theatre_service.models import (
+    Performance,
+    Reservation,
+    SeatHold,
+    TheatreHall,
+    Ticket,
+)
+from theatre_service.tests.test_performance_api import sample_performance
+
+LARGE_TABLES = tuple(
+    model._meta.db_table
+    for model in (Performance, Reservation, SeatHold, Ticket)
+)
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get("Plans", ()):
+        yield from _plan_nodes(child)
+
+
+def sequential_scans(sql, tables):
+    """
+    Returns the plan steps of ``sql`` that read one of ``tables`` in full,
+    either row by row or by walking a whole index, instead of seeking
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SET enable_seqscan = off")
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+            (plan,), = cursor.fetchall()
+            cursor.execute("RESET enable_seqscan")
+            return [
+                f"{node['Node Type']} on {node['Relation Name']}"
+                for node in _plan_nodes(plan[0]["Plan"])
+                if node.get("Relation Name") in tables
+                and (
+                    node["Node Type"] == "Seq Scan"
+                    or (
+                        node["Node Type"].startswith("Index")
+                        and "Index Cond" not in node
+                    )
+                )
+            ]
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        plan = [row[-1].split() for row in cursor.fetchall()]
+    return [
+        " ".join(step) for step in plan
+        if step[0] == "SCAN" and step[1] in tables
+    ]
+
+
+class QueryPlanTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="test_user",
+            email="user@test.com",
+            password="testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.performance = sample_performance(
+            show_time=datetime.datetime(
+                2022, 9, 2, 19, tzinfo=datetime.timezone.utc
+            )
+        )
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            performance=self.performance,
+            reservation=reservation,
+        )
+        SeatHold.objects.create(
+            row=1,
+            seat=2,
+            performance=self.performance,
+            user=self.user,
+            expires_at=datetime.datetime(
+                2100, 1, 1, tzinfo=datetime.timezone.utc
+            ),
+        )
+
+    def assert_no_sequential_scans(self, url, data=None, tables=LARGE_TABLES):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, data=data)
+        self.assertEqual(response.status_code, 200)
+
+        selects = [
+            query["sql"] for query in queries
+            if query["sql"].startswith("SELECT")
+        ]
+        self.assertTrue(selects)
+        for sql in selects:
+            self.assertEqual(sequential_scans(sql, tables), [], sql)
+
+    def test_performance_list_by_date(self):
+        self.assert_no_sequential_scans(
+            reverse("theatre-api:performance-list"), {"date": "2022-09-02"}
+        )
+
+    def test_performance_list_by_date_range(self):
+        self.assert_no_sequential_scans(
+            reverse("theatre-api:performance-list"),
+            {"date_from": "2022-09-01", "date_to": "2022-09-30"},
+        )
+
+    def test_upcoming_performance_list(self):
+        self.assert_no_sequential_scans(
+            reverse("theatre-api:performance-list"), {"upcoming": "true"}
+        )
+
+    def test_performance_list_by_play(self):
+        self.assert_no_sequential_scans(
+            reverse("theatre-api:performance-list"),
+            {"play": self.performance.play_id},
+        )
+
+    def test_reservation_list(self):
+        self.assert_no_sequential_scans(
+            reverse("theatre-api:reservation-list")
+        )
+
+    def test_seat_hold_list(self):
+        self.assert_no_sequential_scans(reverse("theatre-api:seathold-list"))
+
+    def test_theatre_hall_list_by_capacity(self):
+        self.assert_no_sequential_scans(
+            reverse("theatre-api:theatrehall-list"),
+            {"capacity": 10},
+            tables=(TheatreHall._meta.db_table,),
+        )
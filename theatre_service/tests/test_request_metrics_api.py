@@ -0,0 +1,166 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from theatre.metrics import MetricsRegistry, RollingHistogram, registry
+from theatre_service.tests.test_performance_api import sample_performance
+
+PERFORMANCE_URL = reverse("theatre-api:performance-list")
+ASYNC_PERFORMANCE_URL = reverse("theatre-api:async-performance-list")
+METRICS_URL = reverse("metrics")
+
+
+def server_timing(response):
+    return {
+        stage: dict(
+            param.split("=", 1) for param in params.split(";")
+        )
+        for stage, _, params in (
+            entry.partition(";")
+            for entry in response["Server-Timing"].split(", ")
+        )
+    }
+
+
+class RequestMetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        registry.clear()
+        self.user = get_user_model().objects.create_user(
+            username="test_user",
+            email="user@test.com",
+            password="testpass",
+        )
+        self.admin = get_user_model().objects.create_user(
+            username="test_admin",
+            email="admin@test.com",
+            password="testpass",
+            is_staff=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        sample_performance()
+
+    def tearDown(self):
+        registry.clear()
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=0)
+    def test_requests_are_not_measured_when_sampling_is_off(self):
+        response = self.client.get(PERFORMANCE_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("Server-Timing", response)
+        self.assertNotIn("theatre_db_queries_count{", registry.render())
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=1)
+    def test_sampled_request_has_server_timing(self):
+        response = self.client.get(PERFORMANCE_URL)
+
+        timings = server_timing(response)
+        self.assertEqual(
+            list(timings), ["db", "serialize", "render", "total"]
+        )
+        queries = int(re.match(r'"(\d+) queries"', timings["db"]["desc"])[1])
+        self.assertGreater(queries, 0)
+        total = float(timings["total"]["dur"])
+        for stage in ("db", "serialize", "render"):
+            self.assertLessEqual(float(timings[stage]["dur"]), total)
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=1)
+    def test_sampled_requests_are_recorded_per_view(self):
+        self.client.get(PERFORMANCE_URL)
+        self.client.get(PERFORMANCE_URL)
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.client.get(METRICS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        body = response.content.decode()
+        labels = 'view="theatre-api:performance-list",method="GET"'
+        for line in (
+            f"theatre_request_duration_seconds_count{{{labels}}} 2",
+            f"theatre_serialize_duration_seconds_count{{{labels}}} 2",
+            f'theatre_db_queries_bucket{{{labels},le="+Inf"}} 2',
+        ):
+            self.assertIn(line, body)
+
+    def test_metrics_are_staff_only(self):
+        response = self.client.get(METRICS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AsyncRequestMetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        registry.clear()
+        user = get_user_model().objects.create_user(
+            username="test_user",
+            email="user@test.com",
+            password="testpass",
+        )
+        # the async client takes header names as sent
+        self.auth = {"authorization": f"Bearer {AccessToken.for_user(user)}"}
+        sample_performance()
+
+    def tearDown(self):
+        registry.clear()
+
+    @override_settings(DEBUG=True, REQUEST_METRICS_SAMPLE_RATE=0)
+    async def test_async_chain_is_not_adapted(self):
+        # Django logs every middleware it has to adapt to the other mode
+        with self.assertNoLogs("django.request", "DEBUG"):
+            response = await self.async_client.get(
+                ASYNC_PERFORMANCE_URL, **self.auth
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(DEBUG=True, REQUEST_METRICS_SAMPLE_RATE=1)
+    async def test_sampled_async_request_is_measured(self):
+        with self.assertNoLogs("django.request", "DEBUG"):
+            response = await self.async_client.get(
+                ASYNC_PERFORMANCE_URL, **self.auth
+            )
+
+        timings = server_timing(response)
+        self.assertEqual(list(timings), ["db", "serialize", "total"])
+        queries = int(re.match(r'"(\d+) queries"', timings["db"]["desc"])[1])
+        self.assertGreater(queries, 0)
+        self.assertIn(
+            'view="theatre-api:async-performance-list"', registry.render()
+        )
+
+
+class RollingHistogramTests(SimpleTestCase):
+    def test_bucket_counts_are_cumulative(self):
+        histogram = RollingHistogram((1, 5), window=60)
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value, now=0)
+
+        self.assertEqual(histogram.snapshot(now=0), ([2, 3, 4], 14.5))
+
+    def test_observations_leave_the_window(self):
+        histogram = RollingHistogram((1, 5), window=60, slots=6)
+        histogram.observe(2, now=0)
+        histogram.observe(3, now=30)
+
+        self.assertEqual(histogram.snapshot(now=59)[0], [0, 2, 2])
+        self.assertEqual(histogram.snapshot(now=60)[0], [0, 1, 1])
+        self.assertEqual(histogram.snapshot(now=90)[0], [0, 0, 0])
+
+    @override_settings(REQUEST_METRICS_WINDOW=60)
+    def test_label_values_are_escaped(self):
+        metrics = MetricsRegistry()
+        metrics.record('a"b', "GET", {"db_queries": 1}, now=0)
+
+        self.assertIn(
+            'theatre_db_queries_count{view="a\\"b",method="GET"} 1',
+            metrics.render(now=0),
+        )
@@ -1,11 +1,18 @@
+from datetime import timedelta
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from theatre_service.models import Ticket, Reservation
+from theatre_service import reservations
+from theatre_service.models import Performance, Ticket, Reservation
 from theatre_service.tests.test_performance_api import sample_performance
 
 
@@ -21,10 +28,10 @@ def sample_reservation(user):
 
 
 def sample_ticket(reservation, **params):
-    performance = sample_performance()
+    if "performance" not in params:
+        params["performance"] = sample_performance()
 
     defaults = {
-        "performance": performance,
         "row": 2,
         "seat": 2,
         "reservation": reservation,
@@ -46,6 +53,7 @@ class PublicReservationApiTests(TestCase):
 
 class PrivateReservationApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.user = create_user(
             username="test_admin",
             email="test@test.com",
@@ -62,10 +70,217 @@ class PrivateReservationApiTests(TestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_get_reservation_cursor_pagination(self):
+        reservations = [sample_reservation(user=self.user) for _ in range(3)]
+
+        response = self.client.get(
+            RESERVATION_URL, {"pagination": "cursor", "page_size": 2}
+        )
+        next_response = self.client.get(response.data["next"])
+
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]]
+            + [item["id"] for item in next_response.data["results"]],
+            [reservation.id for reservation in reversed(reservations)],
+        )
+
+    def test_reservation_queries_do_not_grow_with_tickets(self):
+        reservation = sample_reservation(user=self.user)
+        performance = sample_ticket(reservation, seat=1).performance
+        for seat in range(2, 6):
+            sample_ticket(reservation, performance=performance, seat=seat)
+        sample_ticket(
+            sample_reservation(user=self.user),
+            performance=performance,
+            seat=6,
+        )
+
+        # count, reservations, tickets joined with performance and play
+        with self.assertNumQueries(3):
+            response = self.client.get(RESERVATION_URL)
+        self.assertEqual(len(response.data["results"][0]["tickets"]), 5)
+
+        # reservation, tickets joined with performance, play and hall
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse("theatre-api:reservation-detail",
+                        args=[reservation.id])
+            )
+        tickets = response.data["tickets"]
+        self.assertEqual(len(tickets), 5)
+        performance.refresh_from_db()
+        self.assertEqual(
+            tickets[0]["performance"]["tickets_available"],
+            performance.tickets_available
+        )
+
     def test_post_reservation(self):
         response = self.client.post(RESERVATION_URL, {})
         self.assertNotEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_post_reservation_inserts_tickets_in_one_statement(self):
+        performance = sample_performance()
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": seat, "performance": performance.id}
+                for seat in range(1, 11)
+            ]
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                RESERVATION_URL, payload, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["tickets"]), 10)
+        self.assertEqual(
+            Ticket.objects.filter(performance=performance).count(), 10
+        )
+        ticket_inserts = [
+            query for query in queries.captured_queries
+            if query["sql"].startswith(
+                f'INSERT INTO "{Ticket._meta.db_table}"'
+            )
+        ]
+        self.assertEqual(len(ticket_inserts), 1)
+
+    def test_post_and_delete_reservation_update_tickets_sold(self):
+        performance = sample_performance()
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": seat, "performance": performance.id}
+                for seat in range(1, 4)
+            ]
+        }
+
+        response = self.client.post(RESERVATION_URL, payload, format="json")
+        performance.refresh_from_db()
+        self.assertEqual(performance.tickets_sold, 3)
+
+        self.client.delete(
+            reverse("theatre-api:reservation-detail",
+                    args=[response.data["id"]])
+        )
+        performance.refresh_from_db()
+        self.assertEqual(performance.tickets_sold, 0)
+
+    def test_delete_reservation_updates_each_counter_once(self):
+        performance = sample_performance()
+        performances = [performance, Performance.objects.create(
+            play=performance.play,
+            theatre_hall=performance.theatre_hall,
+            show_time=performance.show_time + timedelta(days=1),
+        )]
+        reservation = sample_reservation(self.user)
+        for seat in range(1, 6):
+            sample_ticket(
+                reservation, seat=seat, performance=performances[seat % 2]
+            )
+
+        with CaptureQueriesContext(connection) as captured:
+            self.client.delete(
+                reverse("theatre-api:reservation-detail",
+                        args=[reservation.id])
+            )
+
+        counter_updates = [
+            query["sql"]
+            for query in captured.captured_queries
+            if query["sql"].startswith(
+                'UPDATE "theatre_service_performance"'
+            )
+        ]
+        self.assertEqual(len(counter_updates), 2)
+        for performance in performances:
+            performance.refresh_from_db()
+            self.assertEqual(performance.tickets_sold, 0)
+
+    def test_moving_a_ticket_updates_both_counters(self):
+        old = sample_performance()
+        new = Performance.objects.create(
+            play=old.play,
+            theatre_hall=old.theatre_hall,
+            show_time=old.show_time + timedelta(days=1),
+        )
+        ticket = sample_ticket(sample_reservation(self.user), performance=old)
+
+        ticket = Ticket.objects.get(pk=ticket.pk)
+        ticket.performance = new
+        ticket.save()
+
+        old.refresh_from_db()
+        new.refresh_from_db()
+        self.assertEqual((old.tickets_sold, new.tickets_sold), (0, 1))
+
+    def test_post_reservation_with_duplicate_seats(self):
+        performance = sample_performance()
+        ticket = {"row": 1, "seat": 1, "performance": performance.id}
+
+        response = self.client.post(
+            RESERVATION_URL, {"tickets": [ticket, ticket]}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_post_reservation_query_count_does_not_grow_with_tickets(self):
+        performance = sample_performance()
+
+        def post_tickets(row, seats):
+            payload = {
+                "tickets": [
+                    {"row": row, "seat": seat, "performance": performance.id}
+                    for seat in range(1, seats + 1)
+                ]
+            }
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    RESERVATION_URL, payload, format="json"
+                )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(queries)
+
+        self.assertEqual(post_tickets(row=1, seats=1), post_tickets(2, 20))
+
+    def test_post_reservation_reports_all_invalid_seats(self):
+        performance = sample_performance()
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": 100, "performance": performance.id},
+                {"row": 100, "seat": 1, "performance": performance.id},
+                {"row": 1, "seat": 1, "performance": 0},
+            ]
+        }
+
+        response = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            len(response.data["tickets"]["non_field_errors"]), 3
+        )
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_post_reservation_with_taken_seat(self):
+        reservation = sample_reservation(user=self.user)
+        ticket = sample_ticket(reservation)
+        payload = {
+            "tickets": [
+                {
+                    "row": ticket.row,
+                    "seat": ticket.seat,
+                    "performance": ticket.performance_id,
+                }
+            ]
+        }
+
+        response = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["taken_seats"], payload["tickets"])
+        self.assertEqual(Ticket.objects.count(), 1)
+        self.assertEqual(Reservation.objects.count(), 1)
+
     def test_retrieve_reservation(self):
         reservation = sample_reservation(user=self.user)
         sample_ticket(reservation)
@@ -98,6 +313,73 @@ class PrivateReservationApiTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
 
+class ReservationConflictTests(TransactionTestCase):
+    """Outside a test transaction, so that failed writes can be retried"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(
+            username="test_user",
+            email="test@test.com",
+            password="testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.performance = sample_performance()
+        self.payload = {
+            "tickets": [
+                {"row": 1, "seat": 1, "performance": self.performance.id}
+            ]
+        }
+
+    @mock.patch("theatre_service.reservations.time.sleep")
+    def test_transient_error_is_retried(self, sleep):
+        with mock.patch(
+            "theatre_service.reservations._lock_performances",
+            side_effect=[OperationalError("database is locked"), None],
+        ) as lock:
+            response = self.client.post(
+                RESERVATION_URL, self.payload, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(lock.call_count, 2)
+        sleep.assert_called_once()
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_seat_taken_concurrently_is_a_conflict(self):
+        sample_ticket(
+            sample_reservation(self.user),
+            row=1,
+            seat=1,
+            performance=self.performance,
+        )
+        find_taken_seats = reservations.find_taken_seats
+        checks = []
+
+        def taken_after_the_first_check(seats):
+            # the other writer commits right after the first check
+            checks.append(seats)
+            return find_taken_seats(seats) if len(checks) > 1 else set()
+
+        with mock.patch(
+            "theatre_service.reservations.find_taken_seats",
+            side_effect=taken_after_the_first_check,
+        ):
+            response = self.client.post(
+                RESERVATION_URL, self.payload, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        # the second check ran after the insert hit the unique constraint
+        self.assertEqual(len(checks), 2)
+        self.assertEqual(
+            response.data["taken_seats"],
+            [{"performance": self.performance.id, "row": 1, "seat": 1}],
+        )
+        self.assertEqual(Ticket.objects.count(), 1)
+
+
 class AdminReservationApiTests(TestCase):
     def setUp(self):
         self.user = create_user(
@@ -109,6 +391,19 @@ class AdminReservationApiTests(TestCase):
         self.client = APIClient()
         self.client.force_authenticate(user=self.user)
 
+    def test_reservation_etag_is_per_user(self):
+        user = create_user(
+            username="user",
+            email="user@test.com",
+            password="paspassjnf",
+        )
+        etag = self.client.get(RESERVATION_URL)["ETag"]
+
+        self.client.force_authenticate(user=user)
+        response = self.client.get(RESERVATION_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_get_reservation_when_admin_dont_have_reservation(self):
         user = get_user_model().objects.create_user(
             username="user",
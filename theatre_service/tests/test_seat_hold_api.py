@@ -0,0 +1,184 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from theatre_service.models import SeatHold, Ticket
+from theatre_service.tests.test_performance_api import (
+    sample_performance,
+    seats_url,
+    taken_seats,
+)
+
+SEAT_HOLD_URL = reverse("theatre-api:seathold-list")
+RESERVATION_URL = reverse("theatre-api:reservation-list")
+
+
+def create_user(**kwargs):
+    return get_user_model().objects.create_user(**kwargs)
+
+
+def hold_payload(performance, *seats, minutes=10):
+    return {
+        "tickets": [
+            {"row": row, "seat": seat, "performance": performance.id}
+            for row, seat in seats
+        ],
+        "minutes": minutes,
+    }
+
+
+class PublicSeatHoldApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(SEAT_HOLD_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateSeatHoldApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(
+            username="test_user",
+            email="test@test.com",
+            password="testpass",
+        )
+        self.other_user = create_user(
+            username="other_user",
+            email="other@test.com",
+            password="testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.performance = sample_performance()
+
+    def test_hold_seats(self):
+        response = self.client.post(
+            SEAT_HOLD_URL,
+            hold_payload(self.performance, (1, 1), (1, 2)),
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 2)
+        self.assertFalse(Ticket.objects.exists())
+
+        response = self.client.get(SEAT_HOLD_URL)
+        self.assertEqual(response.data["count"], 2)
+
+    def test_hold_minutes_are_limited(self):
+        response = self.client.post(
+            SEAT_HOLD_URL,
+            hold_payload(self.performance, (1, 1), minutes=24 * 60),
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_seats_held_by_another_user_are_not_available(self):
+        self.client.post(
+            SEAT_HOLD_URL,
+            hold_payload(self.performance, (1, 1)),
+            format="json",
+        )
+        self.client.force_authenticate(user=self.other_user)
+
+        hold_response = self.client.post(
+            SEAT_HOLD_URL,
+            hold_payload(self.performance, (1, 1)),
+            format="json",
+        )
+        reservation_response = self.client.post(
+            RESERVATION_URL,
+            hold_payload(self.performance, (1, 1)),
+            format="json",
+        )
+
+        self.assertEqual(hold_response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            reservation_response.status_code, status.HTTP_409_CONFLICT
+        )
+        self.assertEqual(
+            reservation_response.data["taken_seats"],
+            [{"performance": self.performance.id, "row": 1, "seat": 1}],
+        )
+
+    def test_reservation_converts_own_holds(self):
+        self.client.post(
+            SEAT_HOLD_URL,
+            hold_payload(self.performance, (1, 1), (1, 2)),
+            format="json",
+        )
+
+        response = self.client.post(
+            RESERVATION_URL,
+            hold_payload(self.performance, (1, 1)),
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(SeatHold.objects.values_list("row", "seat")), [(1, 2)]
+        )
+
+    def test_expired_holds_are_ignored_and_released(self):
+        SeatHold.objects.create(
+            performance=self.performance,
+            user=self.other_user,
+            row=1,
+            seat=1,
+            expires_at=timezone.now() - datetime.timedelta(minutes=1),
+        )
+
+        response = self.client.post(
+            SEAT_HOLD_URL,
+            hold_payload(self.performance, (1, 1)),
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        SeatHold.objects.update(
+            expires_at=timezone.now() - datetime.timedelta(minutes=1)
+        )
+        call_command(
+            "release_expired_holds", batch_size=1, stdout=StringIO()
+        )
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_seat_map_shows_held_seats(self):
+        self.client.post(
+            SEAT_HOLD_URL,
+            hold_payload(self.performance, (2, 3)),
+            format="json",
+        )
+
+        response = self.client.get(seats_url(self.performance.id))
+
+        held = dict(response.data, bitmap=response.data["held"])
+        self.assertEqual(taken_seats(held), {(2, 3)})
+        self.assertEqual(taken_seats(response.data), set())
+
+    def test_release_hold(self):
+        response = self.client.post(
+            SEAT_HOLD_URL,
+            hold_payload(self.performance, (1, 1)),
+            format="json",
+        )
+
+        hold_id = response.data[0]["id"]
+        response = self.client.delete(
+            reverse("theatre-api:seathold-detail", args=[hold_id])
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(SeatHold.objects.exists())
@@ -55,6 +55,16 @@ class PrivateTheatreHallApiTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["results"], serializer.data)
 
+    def test_filter_theatre_hall_by_capacity(self):
+        sample_theatre_hall(name="Small", rows=5, seats_in_row=10)
+        sample_theatre_hall(name="Large", rows=20, seats_in_row=30)
+
+        response = self.client.get(THEATRE_HALL_LIST_URL, {"capacity": 300})
+
+        self.assertEqual(
+            [hall["name"] for hall in response.data["results"]], ["Large"]
+        )
+
     def test_post_theatre_hall(self):
         payload = {
             "name": "Blue",
@@ -110,6 +120,8 @@ class AdminTheatreHallApiTests(TestCase):
         theatre_hall.refresh_from_db()
         for key in payload.keys():
             self.assertEqual(payload[key], getattr(theatre_hall, key))
+        self.assertEqual(theatre_hall.capacity, 500)
+        self.assertEqual(response.data["capacity"], 500)
 
     def test_delete_theatre_hall(self):
         theatre_hall = sample_theatre_hall()
@@ -0,0 +1,252 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from theatre.throttling import (
+    CacheCounters,
+    CatalogReadThrottle,
+    LocalCounters,
+    RedisCounters,
+    ReservationWriteThrottle,
+    SlidingWindowThrottleMixin,
+    UserSlidingWindowThrottle,
+    local_counters,
+)
+from theatre_service.tests.test_performance_api import sample_performance
+
+GENRE_URL = reverse("theatre-api:genre-list")
+RESERVATION_URL = reverse("theatre-api:reservation-list")
+ASYNC_PERFORMANCE_URL = reverse("theatre-api:async-performance-list")
+
+
+class FakeCache:
+    """Cache whose counters are kept in a dict, or which is unreachable"""
+
+    def __init__(self, down=False):
+        self.down = down
+        self.values = {}
+
+    def _check(self):
+        if self.down:
+            raise ConnectionError("cache is down")
+
+    def incr(self, key):
+        self._check()
+        if key not in self.values:
+            raise ValueError(key)
+        self.values[key] += 1
+        return self.values[key]
+
+    def decr(self, key):
+        self._check()
+        self.values[key] -= 1
+
+    def add(self, key, value, timeout):
+        self._check()
+        return self.values.setdefault(key, value) == value
+
+    def get(self, key):
+        self._check()
+        return self.values.get(key)
+
+
+class ThreePerMinuteThrottle(UserSlidingWindowThrottle):
+    rate = "3/min"
+
+
+class SlidingWindowThrottleTests(SimpleTestCase):
+    def setUp(self):
+        local_counters.clear()
+        self.cache = FakeCache()
+        self.request = APIRequestFactory().get("/")
+        self.request.user = mock.Mock(is_authenticated=True, pk=1)
+
+    def allow(self, now):
+        throttle = ThreePerMinuteThrottle()
+        throttle.timer = lambda: now
+        with mock.patch.object(
+            SlidingWindowThrottleMixin,
+            "get_counters",
+            lambda _: CacheCounters(self.cache),
+        ):
+            return throttle.allow_request(self.request, None), throttle
+
+    def test_limit_within_a_window(self):
+        for second in (0, 10, 20):
+            self.assertTrue(self.allow(second)[0])
+
+        allowed, throttle = self.allow(30)
+
+        self.assertFalse(allowed)
+        # the window ends in 30s, then its 3 requests must weigh 2 or less
+        self.assertAlmostEqual(throttle.wait(), 50)
+
+    def test_throttled_requests_are_not_counted(self):
+        for second in (0, 1, 2, 3, 4):
+            self.allow(second)
+
+        self.assertEqual(list(self.cache.values.values()), [3])
+
+    def test_previous_window_is_weighted_by_its_overlap(self):
+        for second in (0, 10, 20):
+            self.allow(second)
+
+        # halfway through the next window 1.5 of the 3 requests count
+        self.assertTrue(self.allow(90)[0])
+        allowed, throttle = self.allow(90)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(throttle.wait(), 10)
+        self.assertTrue(self.allow(101)[0])
+
+    def test_older_windows_are_ignored(self):
+        for second in (0, 10, 20):
+            self.allow(second)
+
+        for second in (120, 130, 140):
+            self.assertTrue(self.allow(second)[0])
+
+    def test_local_counters_when_the_cache_is_down(self):
+        self.cache.down = True
+
+        results = [self.allow(second)[0] for second in (0, 1, 2, 3)]
+
+        self.assertEqual(results, [True, True, True, False])
+
+    def test_errors_other_than_outages_are_raised(self):
+        self.cache.get = mock.Mock(side_effect=KeyError)
+
+        with self.assertRaises(KeyError):
+            self.allow(0)
+
+    def test_local_counters_are_bounded(self):
+        counters = LocalCounters(max_size=2)
+        for key in ("a", "b", "c"):
+            counters.incr(key, 60)
+
+        self.assertIsNone(counters.get("a"))
+        self.assertEqual(counters.get("c"), 1)
+
+
+class RedisCountersTests(SimpleTestCase):
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                "LOCATION": "redis://primary:6379,redis://replica:6379",
+            }
+        }
+    )
+    def test_redis_cache_counts_on_the_primary(self):
+        counters = ThreePerMinuteThrottle().get_counters()
+
+        self.assertIsInstance(counters, RedisCounters)
+        self.assertEqual(
+            counters.client.connection_pool.connection_kwargs["host"],
+            "primary",
+        )
+
+    def test_every_bump_sets_the_ttl(self):
+        client = mock.Mock()
+        pipeline = client.pipeline.return_value
+        pipeline.execute.return_value = [3, True]
+        counters = RedisCounters(cache, client)
+
+        self.assertEqual(counters.incr("key", 120), 3)
+        counters.decr("key", 120)
+
+        key = cache.make_and_validate_key("key")
+        self.assertEqual(
+            pipeline.mock_calls,
+            [
+                mock.call.incrby(key, 1),
+                mock.call.expire(key, 120),
+                mock.call.execute(),
+                mock.call.incrby(key, -1),
+                mock.call.expire(key, 120),
+                mock.call.execute(),
+            ],
+        )
+
+
+class ThrottleBucketApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="test_user",
+            email="user@test.com",
+            password="testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.performance = sample_performance()
+
+    def reserve(self, seat):
+        return self.client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {
+                        "row": 1,
+                        "seat": seat,
+                        "performance": self.performance.id,
+                    }
+                ]
+            },
+            format="json",
+        )
+
+    @mock.patch.dict(CatalogReadThrottle.THROTTLE_RATES, catalog_read="2/min")
+    def test_catalog_reads_have_their_own_bucket(self):
+        for _ in range(2):
+            self.assertEqual(
+                self.client.get(GENRE_URL).status_code, status.HTTP_200_OK
+            )
+
+        response = self.client.get(GENRE_URL)
+
+        self.assertEqual(
+            response.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        self.assertIn("Retry-After", response)
+        self.assertEqual(
+            self.client.get(RESERVATION_URL).status_code, status.HTTP_200_OK
+        )
+        self.assertEqual(self.reserve(1).status_code, status.HTTP_201_CREATED)
+
+    @mock.patch.dict(CatalogReadThrottle.THROTTLE_RATES, catalog_read="2/min")
+    def test_async_endpoints_share_the_catalog_bucket(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+        for _ in range(2):
+            self.client.get(GENRE_URL)
+
+        response = self.client.get(ASYNC_PERFORMANCE_URL)
+
+        self.assertEqual(
+            response.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        self.assertIn("Retry-After", response)
+
+    @mock.patch.dict(
+        ReservationWriteThrottle.THROTTLE_RATES, reservation_write="1/min"
+    )
+    def test_reservation_writes_have_their_own_bucket(self):
+        self.assertEqual(self.reserve(1).status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(
+            self.reserve(2).status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        self.assertEqual(
+            self.client.get(RESERVATION_URL).status_code, status.HTTP_200_OK
+        )
+        self.assertEqual(
+            self.client.get(GENRE_URL).status_code, status.HTTP_200_OK
+        )
@@ -1,12 +1,18 @@
+from django.urls import path
 from rest_framework import routers
 
+from theatre_service import async_views
 from theatre_service.views import (
+    AutocompleteView,
     ActorViewSet,
     GenreViewSet,
     PlayViewSet,
     TheatreHallViewSet,
     PerformanceViewSet,
     ReservationViewSet,
+    SeatHoldViewSet,
+    ReservationExportView,
+    TicketExportView,
 )
 
 app_name = "theatre-api"
@@ -18,5 +24,31 @@ router.register("plays", PlayViewSet)
 router.register("theatre_halls", TheatreHallViewSet)
 router.register("performances", PerformanceViewSet)
 router.register("reservation", ReservationViewSet)
+router.register("seat_holds", SeatHoldViewSet)
 
-urlpatterns = router.urls
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path(
+        "export/reservations/",
+        ReservationExportView.as_view(),
+        name="export-reservations",
+    ),
+    path(
+        "export/tickets/", TicketExportView.as_view(), name="export-tickets"
+    ),
+    path(
+        "async/performances/",
+        async_views.performance_list,
+        name="async-performance-list",
+    ),
+    path(
+        "async/performances/<int:pk>/",
+        async_views.performance_detail,
+        name="async-performance-detail",
+    ),
+    path(
+        "async/performances/<int:pk>/seats/",
+        async_views.performance_seats,
+        name="async-performance-seats",
+    ),
+] + router.urls
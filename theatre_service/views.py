@@ -1,13 +1,41 @@
-from datetime import datetime
+from datetime import timedelta
 
-from django.db.models import F, Count, Q
-from rest_framework.exceptions import MethodNotAllowed
+from django.db.models import Prefetch, Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import MethodNotAllowed, ValidationError
 from rest_framework.permissions import IsAdminUser
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from theatre.pagination_classes import (
+    PerformanceCursorPagination,
+    ReservationCursorPagination,
+    SwitchablePaginationMixin,
+)
+from theatre_service.autocomplete import autocomplete_index
+from theatre_service.caching import (
+    CachedResponseMixin,
+    ConditionalGetMixin,
+)
+from theatre_service.exports import (
+    EXPORT_CONTENT_TYPES,
+    RESERVATION_COLUMNS,
+    TICKET_COLUMNS,
+    export_lines,
+    reservation_rows,
+    ticket_rows,
+)
+from theatre_service.fast_path import ValuesListMixin
+from theatre_service.filters import (
+    date_param,
+    day_start,
+    filter_performances,
+    is_upcoming,
+)
 from theatre_service.models import (
     Actor,
     Genre,
@@ -15,6 +43,8 @@ from theatre_service.models import (
     TheatreHall,
     Performance,
     Reservation,
+    SeatHold,
+    Ticket,
 )
 from theatre_service.serializers import (
     ActorSerializer,
@@ -31,38 +61,64 @@ from theatre_service.serializers import (
     ReservationListSerializer,
     ReservationDetailSerializer,
     PlayImageSerializer,
+    SeatHoldSerializer,
+    SeatHoldCreateSerializer,
 )
+from theatre_service.reservations import release_holds
+from theatre_service.search import search_actors, search_genres, search_plays
+from theatre_service.seat_map import get_seat_map
 
 
-class ActorViewSet(viewsets.ModelViewSet):
+class ActorViewSet(
+    ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet
+):
     queryset = Actor.objects.all()
     serializer_class = ActorSerializer
+    throttle_bucket = "catalog"
+    cache_dependencies = (Actor,)
 
     def get_queryset(self):
         queryset = self.queryset
         word = self.request.query_params.get("actors")
+        search = self.request.query_params.get("search")
         if word:
             queryset = queryset.filter(
                 Q(first_name__icontains=word)
                 & Q(last_name__icontains=word))
+        if search:
+            queryset = search_actors(queryset, search)
         return queryset
 
 
-class GenreViewSet(viewsets.ModelViewSet):
+class GenreViewSet(
+    ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet
+):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    throttle_bucket = "catalog"
+    cache_dependencies = (Genre,)
 
     def get_queryset(self):
         queryset = self.queryset
         title = self.request.query_params.get("genre")
+        search = self.request.query_params.get("search")
         if title:
             queryset = queryset.filter(name__icontains=title)
+        if search:
+            queryset = search_genres(queryset, search)
         return queryset
 
 
-class PlayViewSet(viewsets.ModelViewSet):
+class PlayViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    ValuesListMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Play.objects.prefetch_related("actors", "genres")
     serializer_class = PlaySerializer
+    throttle_bucket = "catalog"
+    cache_dependencies = (Play, Actor, Genre)
 
     @staticmethod
     def _params_to_ints(qs):
@@ -75,10 +131,14 @@ class PlayViewSet(viewsets.ModelViewSet):
         title = self.request.query_params.get("title")
         actors = self.request.query_params.get("actors")
         genres = self.request.query_params.get("genres")
+        search = self.request.query_params.get("search")
 
         if title:
             queryset = queryset.filter(title__icontains=title)
 
+        if search:
+            queryset = search_plays(queryset, search)
+
         if genres:
             genres_ids = self._params_to_ints(genres)
             queryset = queryset.filter(genres__id__in=genres_ids)
@@ -87,6 +147,11 @@ class PlayViewSet(viewsets.ModelViewSet):
             actors_ids = self._params_to_ints(actors)
             queryset = queryset.filter(actors__id__in=actors_ids)
 
+        if self.action in ("list", "retrieve"):
+            queryset = self.get_serializer_class().trim_queryset(
+                queryset, self.request
+            )
+
         return queryset.distinct()
 
     def get_serializer_class(self):
@@ -114,9 +179,13 @@ class PlayViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class TheatreHallViewSet(viewsets.ModelViewSet):
+class TheatreHallViewSet(
+    ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet
+):
     queryset = TheatreHall.objects.all()
     serializer_class = TheatreHallSerializer
+    throttle_bucket = "catalog"
+    cache_dependencies = (TheatreHall,)
 
     def get_queryset(self):
         queryset = self.queryset
@@ -132,9 +201,7 @@ class TheatreHallViewSet(viewsets.ModelViewSet):
         """
         if capacity is not None and capacity.isdigit():
             capacity_int = int(capacity)
-            queryset = queryset.annotate(
-                size=F("seats_in_row") * F("rows")
-            ).filter(size__gte=capacity_int)
+            queryset = queryset.filter(capacity__gte=capacity_int)
 
         return queryset
 
@@ -144,34 +211,44 @@ class TheatreHallViewSet(viewsets.ModelViewSet):
         return TheatreHallSerializer
 
 
-class PerformanceViewSet(viewsets.ModelViewSet):
-    queryset = (
-        Performance.objects
-        .select_related("play", "theatre_hall")
-        .annotate(
-            tickets_available=(
-                F("theatre_hall__rows")
-                * F("theatre_hall__seats_in_row")
-                - Count("tickets")
-            )
-        )
-    )
+class PerformanceViewSet(
+    SwitchablePaginationMixin,
+    ConditionalGetMixin,
+    ValuesListMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Performance.objects.select_related("play", "theatre_hall")
     serializer_class = PerformanceSerializer
+    throttle_bucket = "catalog"
+    cursor_pagination_class = PerformanceCursorPagination
+    # the detail nests the play with its actor and genre names
+    cache_dependencies = (
+        Performance, Play, Actor, Genre, TheatreHall, Ticket
+    )
 
-    def get_queryset(self):
-        date = self.request.query_params.get("date")
-        play_id_str = self.request.query_params.get("play")
-
-        queryset = self.queryset
+    def get_dependency_versions(self):
+        versions = super().get_dependency_versions()
+        if is_upcoming(self.request.query_params):
+            # performances leave the upcoming list as they start, so its
+            # ETag is renewed every minute
+            versions = f"{versions}-{timezone.now():%Y%m%d%H%M}"
+        return versions
 
-        if date:
-            date = datetime.strptime(date, "%Y-%m-%d").date()
-            queryset = queryset.filter(show_time__date=date)
+    def get_queryset(self):
+        queryset = filter_performances(
+            self.queryset, self.request.query_params
+        )
 
-        if play_id_str:
-            queryset = queryset.filter(play_id=int(play_id_str))
+        if self.action in ("list", "retrieve"):
+            # cursor pagination reads its ordering columns off the last row
+            ordering = getattr(self.paginator, "ordering", ())
+            queryset = self.get_serializer_class().trim_queryset(
+                queryset,
+                self.request,
+                keep=[field.lstrip("-") for field in ordering],
+            )
 
-        return queryset.distinct()
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -180,17 +257,45 @@ class PerformanceViewSet(viewsets.ModelViewSet):
             return PerformanceDetailSerializer
         return PerformanceSerializer
 
+    @action(methods=["GET"], detail=True, url_path="seats")
+    def seats(self, request, pk=None):
+        """
+        Seat occupancy of the performance as base64 row-major bitmaps with
+        one bit per seat: ``bitmap`` marks sold seats, ``held`` marks
+        seats under an active hold
+        """
+        return Response(get_seat_map(self.get_object()))
 
-class ReservationViewSet(viewsets.ModelViewSet):
-    queryset = Reservation.objects.prefetch_related(
-        "tickets__performance__play",
-        "tickets__reservation"
-    )
+
+class ReservationViewSet(
+    SwitchablePaginationMixin,
+    ConditionalGetMixin,
+    ValuesListMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Reservation.objects.all()
     serializer_class = ReservationSerializer
+    throttle_bucket = "reservations"
     permission_classes = (IsAuthenticated,)
+    cursor_pagination_class = ReservationCursorPagination
+    cache_dependencies = (
+        Reservation, Ticket, Performance, Play, TheatreHall
+    )
+    etag_per_user = True
 
     def get_queryset(self):
-        return Reservation.objects.filter(user=self.request.user)
+        queryset = self.queryset.filter(user=self.request.user)
+
+        if self.action == "list":
+            tickets = Ticket.objects.select_related("performance__play")
+        elif self.action == "retrieve":
+            tickets = Ticket.objects.select_related(
+                "performance__play", "performance__theatre_hall"
+            )
+        else:
+            return queryset
+
+        return queryset.prefetch_related(Prefetch("tickets", tickets))
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -204,3 +309,115 @@ class ReservationViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+
+class SeatHoldViewSet(
+    mixins.ListModelMixin,
+    mixins.CreateModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    Seats held for the current user. A hold is converted into tickets by
+    posting a reservation for the same seats before it expires
+    """
+    queryset = SeatHold.objects.all()
+    serializer_class = SeatHoldSerializer
+    throttle_bucket = "reservations"
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return self.queryset.filter(
+            user=self.request.user, expires_at__gt=timezone.now()
+        )
+
+    def get_serializer_class(self):
+        if self.action == "create":
+            return SeatHoldCreateSerializer
+        return SeatHoldSerializer
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        holds = serializer.save(user=request.user)
+        return Response(
+            SeatHoldSerializer(holds, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    def perform_destroy(self, instance):
+        release_holds(SeatHold.objects.filter(pk=instance.pk))
+
+
+class AutocompleteView(APIView):
+    """
+    Typeahead over play titles, actor names and genre names served from
+    the in-process prefix index; ``q`` is the typed text and ``limit``
+    caps the number of results
+    """
+    throttle_bucket = "catalog"
+    default_limit = 10
+    max_limit = 50
+
+    def get(self, request):
+        limit = request.query_params.get("limit")
+        if limit is None:
+            limit = self.default_limit
+        elif not limit.isdigit() or int(limit) < 1:
+            raise ValidationError({"limit": "Must be a positive integer."})
+        else:
+            limit = min(int(limit), self.max_limit)
+        return Response(
+            {
+                "results": autocomplete_index.search(
+                    request.query_params.get("q", ""), limit
+                )
+            }
+        )
+
+
+class ExportView(APIView):
+    """
+    Staff-only streamed export of every row, as CSV or NDJSON picked with
+    ``export_format``. ``date_from`` and ``date_to`` narrow it to the
+    performances shown between those days.
+
+    Subclasses set ``export_name``, the file name, ``columns`` and
+    ``row_source``, the function returning the rows for a show time range
+    """
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        export_format = request.query_params.get("export_format", "csv")
+        if export_format not in EXPORT_CONTENT_TYPES:
+            raise ValidationError(
+                {"export_format": f"Must be one of: "
+                                  f"{', '.join(EXPORT_CONTENT_TYPES)}."}
+            )
+        start = date_param(request.query_params, "date_from")
+        end = date_param(request.query_params, "date_to")
+        rows = self.row_source((
+            start and day_start(start),
+            end and day_start(end + timedelta(days=1)),
+        ))
+
+        response = StreamingHttpResponse(
+            export_lines(export_format, self.columns, rows),
+            content_type=EXPORT_CONTENT_TYPES[export_format],
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{self.export_name}.{export_format}"'
+        )
+        return response
+
+
+class ReservationExportView(ExportView):
+    export_name = "reservations"
+    columns = RESERVATION_COLUMNS
+    row_source = staticmethod(reservation_rows)
+
+
+class TicketExportView(ExportView):
+    export_name = "tickets"
+    columns = TICKET_COLUMNS
+    row_source = staticmethod(ticket_rows)